@@ -3,6 +3,51 @@ const InterviewSession = require('../models/interviewSession');
 
 const PROCTORING_SERVICE_URL = 'http://localhost:5001';
 
+// Aggregate window size stored in MongoDB (one of the service's AGGREGATE_WINDOWS)
+const PROCTORING_WINDOW_SECONDS = 10;
+
+// Store aggregate windows from the proctoring service, one record each.
+// A window can be delivered twice (with a frame and by a report), so the
+// update only applies if no window with that start is stored yet.
+// Returns the session's updated counters, or null if nothing was stored.
+async function storeWindows(sessionId, windows) {
+    let stored = null;
+    for (const w of windows || []) {
+        if (w.window_seconds !== PROCTORING_WINDOW_SECONDS) continue;
+        const start = new Date(w.start);
+        const session = await InterviewSession.findOneAndUpdate(
+            { _id: sessionId, 'proctoring_windows.start': { $ne: start } },
+            {
+                $push: { proctoring_windows: w },
+                $inc: {
+                    total_violations: w.violations.total,
+                    'proctoring_summary.face_anomalies': w.violations.face_anomalies,
+                    'proctoring_summary.total_frames_analyzed': w.frames
+                }
+            },
+            { new: true, projection: { total_violations: 1, proctoring_summary: 1 } }
+        );
+        if (session) stored = session;
+    }
+    return stored;
+}
+
+// Bring stored windows up to date: windows that have ended since the last
+// frame, plus - once the interview is over - the final, partial ones
+async function syncWindows(sessionId, interviewEnded) {
+    try {
+        const response = interviewEnded
+            ? await axios.post(`${PROCTORING_SERVICE_URL}/session/${sessionId}/aggregates/close`)
+            : await axios.get(`${PROCTORING_SERVICE_URL}/session/${sessionId}/aggregates`, {
+                params: { window: PROCTORING_WINDOW_SECONDS }
+            });
+        await storeWindows(sessionId, response.data.windows);
+    } catch (error) {
+        // 404: no frame was ever analyzed for this session
+        if (!error.response || error.response.status !== 404) throw error;
+    }
+}
+
 // Analyze frame endpoint
 exports.analyzeFrame = async (req, res) => {
     try {
@@ -38,37 +83,20 @@ exports.analyzeFrame = async (req, res) => {
             if (err) console.error('Error appending to activity.txt:', err);
         });
 
-        // Update session with proctoring data
-        const session = await InterviewSession.findById(sessionId);
-        if (!session) {
-            return res.status(404).json({
-                success: false,
-                message: 'Session not found'
-            });
-        }
-
-        // Add activity to session
-        session.proctoring_activities.push(analysis);
-        session.proctoring_summary.total_frames_analyzed += 1;
-
-        // Count violations
-        if (analysis.suspicious_activity && analysis.suspicious_activity.length > 0) {
-            session.total_violations += analysis.suspicious_activity.length;
-
-            if (analysis.suspicious_activity.includes('face_anomaly')) {
-                session.proctoring_summary.face_anomalies += 1;
-            }
-        }
-
-        await session.save();
+        // Persist one record per closed aggregate window instead of every frame
+        const session = await storeWindows(sessionId, response.data.windows);
+        const sessionStats = session && {
+            total_violations: session.total_violations,
+            frames_analyzed: session.proctoring_summary.total_frames_analyzed
+        };
 
         res.json({
             success: true,
             analysis,
-            session_stats: {
-                total_violations: session.total_violations,
-                frames_analyzed: session.proctoring_summary.total_frames_analyzed
-            }
+            // Recommended interval / resolution / JPEG quality for the next frame
+            capture: response.data.capture,
+            // Only set when this frame closed a window (stats are updated per window)
+            session_stats: sessionStats
         });
 
     } catch (error) {
@@ -86,43 +114,37 @@ exports.getProctoringReport = async (req, res) => {
     try {
         const { sessionId } = req.params;
 
-        const session = await InterviewSession.findById(sessionId);
-        if (!session) {
+        const interview = await InterviewSession.findById(sessionId).select('status');
+        if (!interview) {
             return res.status(404).json({
                 success: false,
                 message: 'Session not found'
             });
         }
 
-        // Also get detailed report from Python service
+        // Store pending windows, then get the detailed report from the Python service
+        let pythonSummary = null;
         try {
+            await syncWindows(sessionId, interview.status === 'completed');
             const detailedReport = await axios.get(
                 `${PROCTORING_SERVICE_URL}/session/${sessionId}/summary`
             );
-
-            res.json({
-                success: true,
-                session_id: sessionId,
-                mongo_summary: session.proctoring_summary,
-                total_violations: session.total_violations,
-                activities_count: session.proctoring_activities.length,
-                python_service_summary: detailedReport.data.summary || null,
-                recent_activities: session.proctoring_activities.slice(-10) // Last 10 activities
-            });
-
+            pythonSummary = detailedReport.data.summary || null;
         } catch (serviceError) {
             // If Python service is down, return MongoDB data only
-            res.json({
-                success: true,
-                session_id: sessionId,
-                mongo_summary: session.proctoring_summary,
-                total_violations: session.total_violations,
-                activities_count: session.proctoring_activities.length,
-                python_service_summary: null,
-                recent_activities: session.proctoring_activities.slice(-10)
-            });
         }
 
+        const session = await InterviewSession.findById(sessionId);
+        res.json({
+            success: true,
+            session_id: sessionId,
+            mongo_summary: session.proctoring_summary,
+            total_violations: session.total_violations,
+            windows_count: session.proctoring_windows.length,
+            python_service_summary: pythonSummary,
+            recent_windows: session.proctoring_windows.slice(-6) // Last minute of 10 s windows
+        });
+
     } catch (error) {
         console.error('Error generating proctoring report:', error);
         res.status(500).json({
@@ -12,6 +12,27 @@ const ProctoringActivitySchema = new mongoose.Schema({
   suspicious_activity: [String]
 });
 
+// Rolled-up proctoring activity over a fixed time window (from the Python service)
+const ProctoringWindowSchema = new mongoose.Schema({
+  window_seconds: Number,
+  start: Date,
+  end: Date,
+  frames: Number,
+  violations: {
+    face_anomalies: { type: Number, default: 0 },
+    gaze_violations: { type: Number, default: 0 },
+    head_movement_violations: { type: Number, default: 0 },
+    object_detections: { type: Number, default: 0 },
+    audio_violations: { type: Number, default: 0 },
+    total: { type: Number, default: 0 }
+  },
+  face_present_ratio: Number,
+  gaze_away_ratio: Number,
+  blinks: Number,
+  blink_rate_per_minute: Number,
+  object_sightings: { type: Map, of: Number }
+}, { _id: false });
+
 const interviewSessionSchema = new mongoose.Schema({
   candidate: { type: mongoose.Schema.Types.ObjectId, ref: 'Candidate', required: true },
   questions: [{ type: String }], // question IDs or texts
@@ -24,7 +45,9 @@ const interviewSessionSchema = new mongoose.Schema({
 
   // Proctoring data added below
   proctoring_enabled: { type: Boolean, default: false },
+  // Legacy: per-frame analyses, no longer written (see proctoring_windows)
   proctoring_activities: [ProctoringActivitySchema],
+  proctoring_windows: [ProctoringWindowSchema],
   total_violations: { type: Number, default: 0 },
   proctoring_summary: {
     face_anomalies: { type: Number, default: 0 },
@@ -8,6 +8,8 @@ export function useProctoring(sessionId) {
   const [status, setStatus] = useState('Initializing...');
   const [analysis, setAnalysis] = useState(null);
   const intervalRef = useRef(null);
+  // Capture settings recommended by the proctoring service
+  const captureRef = useRef({ interval_ms: 1000, max_width: null, max_height: null, jpeg_quality: 0.85 });
 
   // Initialize webcam on mount
   useEffect(() => {
@@ -25,7 +27,7 @@ export function useProctoring(sessionId) {
     startVideo();
 
     return () => {
-      if (intervalRef.current) clearInterval(intervalRef.current);
+      if (intervalRef.current) clearTimeout(intervalRef.current);
       if (videoRef.current && videoRef.current.srcObject) {
         videoRef.current.srcObject.getTracks().forEach(t => t.stop());
       }
@@ -48,36 +50,56 @@ export function useProctoring(sessionId) {
     };
   }, [sessionId]);
 
-  // Capture & send frame every second
+  // Capture & send frames at the interval the service recommends
   useEffect(() => {
     if (!sessionId || !videoRef.current) return;
 
-    intervalRef.current = setInterval(() => {
-      captureAndSendFrame();
-    }, 1000);
+    let cancelled = false;
+    const loop = async () => {
+      await captureAndSendFrame();
+      if (!cancelled) {
+        intervalRef.current = setTimeout(loop, captureRef.current.interval_ms);
+      }
+    };
+    intervalRef.current = setTimeout(loop, captureRef.current.interval_ms);
 
-    return () => clearInterval(intervalRef.current);
+    return () => {
+      cancelled = true;
+      clearTimeout(intervalRef.current);
+    };
   }, [sessionId, videoRef.current]);
 
   const captureAndSendFrame = async () => {
     const video = videoRef.current;
     if (!video) return;
 
+    // Never send more pixels than the service will analyze
+    const { max_width, max_height, jpeg_quality } = captureRef.current;
+    const scale = Math.min(
+      1,
+      max_width ? max_width / video.videoWidth : 1,
+      max_height ? max_height / video.videoHeight : 1
+    );
+
     const canvas = document.createElement('canvas');
-    canvas.width = video.videoWidth;
-    canvas.height = video.videoHeight;
+    canvas.width = Math.round(video.videoWidth * scale);
+    canvas.height = Math.round(video.videoHeight * scale);
 
     const ctx = canvas.getContext('2d');
     ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-    const dataUrl = canvas.toDataURL('image/jpeg');
+    const dataUrl = canvas.toDataURL('image/jpeg', jpeg_quality);
     const base64Image = dataUrl.split(',')[1];
 
     try {
-      await fetch(`/api/proctoring/session/${sessionId}/analyze-frame`, {
+      const response = await fetch(`/api/proctoring/session/${sessionId}/analyze-frame`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ frameData: base64Image }),
       });
+      const result = await response.json();
+      if (result.capture) {
+        captureRef.current = result.capture;
+      }
       setStatus('Frame sent for analysis');
     } catch (err) {
       setStatus('Error sending frame: ' + err.message);
@@ -0,0 +1,240 @@
+# activity_store.py - Bounded, columnar per-session activity log
+from datetime import datetime
+import numpy as np
+from config import Config
+
+# Enum codes for the status columns; unknown values are stored as 'error'
+FACE_STATUSES = ['normal', 'no_face', 'multiple_faces', 'no_frame', 'error', 'timeout']
+GAZE_DIRECTIONS = ['center', 'looking_away', 'no_eyes', 'error', 'timeout', 'skipped']
+HEAD_POSES = ['normal', 'head_turned', 'no_face', 'error', 'timeout']
+BLINK_STATUSES = ['no_blink', 'blink', 'error', 'timeout', 'skipped']
+
+# Bit flags for suspicious_activity
+SUSPICIOUS_FLAGS = ['face_anomaly', 'looking_away', 'head_movement', 'objects_detected', 'analysis_error', 'suspicious_audio']
+
+# Running counter name for each suspicious flag (as used by the summary)
+SUMMARY_COUNTERS = {
+    'face_anomaly': 'face_anomalies',
+    'looking_away': 'gaze_violations',
+    'head_movement': 'head_movement_violations',
+    'objects_detected': 'object_detections',
+    'suspicious_audio': 'audio_violations'
+}
+
+COLUMNS = {
+    'timestamp': np.float64,
+    'face_status': np.uint8,
+    'faces_count': np.uint8,
+    'gaze_direction': np.uint8,
+    'head_pose': np.uint8,
+    'blink_status': np.uint8,
+    'blink_count': np.uint32,
+    'suspicious_activity': np.uint8,   # SUSPICIOUS_FLAGS bitmask
+    'detected_objects': np.uint32      # Config.SUSPICIOUS_OBJECTS bitmask
+}
+
+# One row of the columns above, as stored on disk by session_journal
+RECORD_DTYPE = np.dtype([(name, np.dtype(dtype).newbyteorder('<')) for name, dtype in COLUMNS.items()])
+
+# Summary counters in a fixed order (for binary footers)
+COUNTER_NAMES = [
+    'total_frames_analyzed', 'total_blinks', 'face_anomalies', 'gaze_violations',
+    'head_movement_violations', 'object_detections', 'total_violations', 'audio_violations'
+]
+
+# Keys of an exported entry after 'seq', in output order
+ENTRY_FIELDS = [
+    'timestamp', 'face_status', 'gaze_direction', 'head_pose', 'blink_status',
+    'faces_count', 'blink_count', 'detected_objects', 'suspicious_activity'
+]
+
+ENUMS = {
+    'face_status': FACE_STATUSES,
+    'gaze_direction': GAZE_DIRECTIONS,
+    'head_pose': HEAD_POSES,
+    'blink_status': BLINK_STATUSES
+}
+
+
+def _code(values, value):
+    try:
+        return values.index(value)
+    except ValueError:
+        return values.index('error')
+
+
+def _bitmask(names, present):
+    mask = 0
+    for name in present:
+        if name in names:
+            mask |= 1 << names.index(name)
+    return mask
+
+
+def _unmask(names, mask):
+    return [name for i, name in enumerate(names) if mask & (1 << i)]
+
+
+def counters_of(records):
+    """Summary counters for an array of RECORD_DTYPE rows (same rules as append)"""
+    counters = dict.fromkeys(COUNTER_NAMES, 0)
+    if not len(records):
+        return counters
+    flags = records['suspicious_activity']
+    counters['total_frames_analyzed'] = len(records)
+    counters['total_blinks'] = int(records['blink_count'].max())
+    for i, flag in enumerate(SUSPICIOUS_FLAGS):
+        hits = int(np.count_nonzero(flags & (1 << i)))
+        if flag in SUMMARY_COUNTERS:
+            counters[SUMMARY_COUNTERS[flag]] += hits
+        counters['total_violations'] += hits
+    return counters
+
+
+def merge_counters(a, b):
+    """Counters covering both a and b (blinks are a running maximum)"""
+    merged = {name: a[name] + b[name] for name in COUNTER_NAMES}
+    merged['total_blinks'] = max(a['total_blinks'], b['total_blinks'])
+    return merged
+
+
+class ActivityStore:
+    """
+    Fixed-capacity ring buffer of per-frame analyses, one NumPy array per
+    field with enum codes / bitmasks instead of strings.
+
+    Every entry gets a sequence number (0, 1, 2, ...). Once the buffer is
+    full the oldest entries are overwritten, but the running counters
+    keep covering the whole session, so summaries stay exact and O(1).
+    """
+    def __init__(self, capacity=None):
+        self.capacity = capacity or Config.ACTIVITY_LOG_CAPACITY
+        self.columns = {name: np.zeros(self.capacity, dtype) for name, dtype in COLUMNS.items()}
+        self.reset()
+
+    def reset(self):
+        self.next_seq = 0
+        self.counters = dict.fromkeys(COUNTER_NAMES, 0)
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+    def __len__(self):
+        """Number of entries currently retained"""
+        return min(self.next_seq, self.capacity)
+
+    @property
+    def first_seq(self):
+        """Sequence number of the oldest retained entry"""
+        return self.next_seq - len(self)
+
+    def append(self, analysis):
+        """Store one analysis dict and update the running counters"""
+        i = self.next_seq % self.capacity
+        cols = self.columns
+        suspicious = analysis.get('suspicious_activity', [])
+
+        cols['timestamp'][i] = datetime.fromisoformat(analysis['timestamp']).timestamp()
+        for name, values in ENUMS.items():
+            cols[name][i] = _code(values, analysis.get(name))
+        cols['faces_count'][i] = min(analysis.get('faces_count', 0), 255)
+        cols['blink_count'][i] = analysis.get('blink_count', 0)
+        cols['suspicious_activity'][i] = _bitmask(SUSPICIOUS_FLAGS, suspicious)
+        cols['detected_objects'][i] = _bitmask(Config.SUSPICIOUS_OBJECTS, analysis.get('detected_objects', []))
+        self.next_seq += 1
+
+        counters = self.counters
+        counters['total_frames_analyzed'] += 1
+        counters['total_blinks'] = max(counters['total_blinks'], analysis.get('blink_count', 0))
+        for flag in suspicious:
+            if flag in SUMMARY_COUNTERS:
+                counters[SUMMARY_COUNTERS[flag]] += 1
+        counters['total_violations'] += len(suspicious)
+
+    def summary(self):
+        return {
+            **self.counters,
+            'retained_entries': len(self),
+            'evicted_entries': self.first_seq
+        }
+
+    def _value(self, name, i):
+        column = self.columns[name]
+        if name == 'timestamp':
+            return datetime.fromtimestamp(column[i]).isoformat()
+        if name in ENUMS:
+            return ENUMS[name][column[i]]
+        if name == 'detected_objects':
+            return sorted(_unmask(Config.SUSPICIOUS_OBJECTS, int(column[i])))
+        if name == 'suspicious_activity':
+            return _unmask(SUSPICIOUS_FLAGS, int(column[i]))
+        return int(column[i])
+
+    def _entry(self, seq, fields=None):
+        i = seq % self.capacity
+        entry = {'seq': seq}
+        for name in fields or ENTRY_FIELDS:
+            entry[name] = self._value(name, i)
+        return entry
+
+    def entries(self, start_seq=None, end_seq=None):
+        """Yield retained entries as dicts, oldest first"""
+        start = self.first_seq if start_seq is None else max(start_seq, self.first_seq)
+        end = self.next_seq if end_seq is None else min(end_seq, self.next_seq)
+        for seq in range(start, end):
+            yield self._entry(seq)
+
+    def page(self, cursor=None, limit=None, since=None, until=None, fields=None):
+        """
+        Retained entries from sequence number `cursor` on, oldest first.
+
+        since/until are epoch seconds (until exclusive) and fields limits
+        each entry to the given ENTRY_FIELDS ('seq' is always included).
+        Returns (entries, next_cursor); next_cursor is None once there is
+        nothing left to read.
+        """
+        start = self.first_seq if cursor is None else max(cursor, self.first_seq)
+        seqs = np.arange(start, self.next_seq)
+
+        if since is not None or until is not None:
+            stamps = self.columns['timestamp'][seqs % self.capacity]
+            keep = np.ones(len(seqs), dtype=bool)
+            if since is not None:
+                keep &= stamps >= since
+            if until is not None:
+                keep &= stamps < until
+            seqs = seqs[keep]
+
+        next_cursor = None
+        if limit is not None and len(seqs) > limit:
+            seqs = seqs[:limit]
+            next_cursor = int(seqs[-1]) + 1
+
+        return [self._entry(int(seq), fields) for seq in seqs], next_cursor
+
+    def records(self, start_seq, end_seq):
+        """Retained entries in [start_seq, end_seq) as a RECORD_DTYPE array"""
+        start = max(start_seq, self.first_seq)
+        end = min(end_seq, self.next_seq)
+        index = np.arange(start, max(start, end)) % self.capacity
+        out = np.empty(len(index), RECORD_DTYPE)
+        for name, column in self.columns.items():
+            out[name] = column[index]
+        return out
+
+    def restore(self, records, next_seq, counters):
+        """
+        Reload a persisted session: `records` are the newest entries
+        (ending at next_seq - 1), `counters` cover the whole session
+        """
+        self.reset()
+        tail = records[-self.capacity:]
+        index = np.arange(next_seq - len(tail), next_seq) % self.capacity
+        for name, column in self.columns.items():
+            column[index] = tail[name]
+        self.next_seq = next_seq
+        self.counters.update(counters)
+
+    def to_list(self):
+        return list(self.entries())
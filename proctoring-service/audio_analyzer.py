@@ -0,0 +1,151 @@
+# audio_analyzer.py - Windowed features over a session's streamed PCM audio
+import numpy as np
+from config import Config
+
+
+class AudioStreamAnalyzer:
+    """
+    Per-session audio analysis for 16-bit mono PCM pushed by the client.
+
+    Samples go into a ring buffer whose size is a whole number of
+    analysis windows (AUDIO_WINDOW_MS). Every complete window is split
+    into AUDIO_FRAME_MS frames and all of them are processed in one
+    NumPy pass: RMS and peak per window, and voice activity as the share
+    of frames whose RMS is well above a slowly adapting noise floor.
+
+    A window is 'loud' when its peak exceeds AUDIO_THRESHOLD and 'voice'
+    when enough of its frames are speech-like. Window results are also
+    folded into a pending aggregate that the engine attaches to the next
+    video analysis (take_pending), so audio and video share a timeline.
+    """
+    def __init__(self, sample_rate=None):
+        self.configure(sample_rate or Config.AUDIO_SAMPLE_RATE)
+
+    def configure(self, sample_rate):
+        """(Re)size the buffers for a sample rate; drops buffered audio"""
+        self.sample_rate = sample_rate
+        self.frame_len = max(1, sample_rate * Config.AUDIO_FRAME_MS // 1000)
+        self.frames_per_window = max(1, Config.AUDIO_WINDOW_MS // Config.AUDIO_FRAME_MS)
+        self.window_len = self.frame_len * self.frames_per_window
+        windows = max(2, int(Config.AUDIO_BUFFER_SECONDS * sample_rate) // self.window_len)
+        self.buffer = np.zeros(windows * self.window_len, np.int16)
+        self.reset()
+
+    def reset(self):
+        self.written = 0            # samples received in total
+        self.processed = 0          # samples covered by complete windows
+        self.noise_floor = None
+        self.stats = {'samples': 0, 'windows': 0, 'voice_windows': 0, 'loud_windows': 0}
+        self._clear_pending()
+
+    def _clear_pending(self):
+        self.pending = {'windows': 0, 'voice_windows': 0, 'loud_windows': 0, 'peak': 0, 'energy': 0.0}
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes
+
+    def feed(self, pcm):
+        """
+        Add raw little-endian int16 samples (bytes-like) and analyze every
+        window they complete. Returns the per-window features.
+        """
+        samples = np.frombuffer(pcm, '<i2', count=len(pcm) // 2)
+        self.stats['samples'] += len(samples)
+
+        features = []
+        capacity = len(self.buffer)
+        while len(samples):
+            # Never overwrite samples that haven't been analyzed yet
+            room = capacity - (self.written - self.processed)
+            chunk, samples = samples[:room], samples[room:]
+            start = self.written % capacity
+            first = min(len(chunk), capacity - start)
+            self.buffer[start:start + first] = chunk[:first]
+            self.buffer[:len(chunk) - first] = chunk[first:]
+            self.written += len(chunk)
+            features.extend(self._analyze_complete_windows())
+        return features
+
+    def _analyze_complete_windows(self):
+        capacity = len(self.buffer)
+        count = (self.written - self.processed) // self.window_len
+        if count == 0:
+            return []
+
+        # Windows never straddle the end of the buffer (capacity is a
+        # multiple of window_len), so at most two contiguous runs
+        start = self.processed % capacity
+        first = min(count, (capacity - start) // self.window_len)
+        runs = [self.buffer[start:start + first * self.window_len]]
+        if count > first:
+            runs.append(self.buffer[:(count - first) * self.window_len])
+        samples = np.concatenate(runs) if len(runs) > 1 else runs[0]
+        self.processed += count * self.window_len
+
+        frames = samples.reshape(count, self.frames_per_window, self.frame_len).astype(np.float32)
+        frame_rms = np.sqrt(np.mean(frames * frames, axis=2))
+        window_rms = np.sqrt(np.mean(frame_rms * frame_rms, axis=1))
+        peak = np.abs(frames).max(axis=(1, 2))
+
+        # Noise floor: quiet end of what was just heard, allowed to rise slowly
+        quiet = float(np.percentile(frame_rms, 10))
+        if self.noise_floor is None:
+            self.noise_floor = quiet
+        else:
+            self.noise_floor = min(self.noise_floor * Config.AUDIO_NOISE_FLOOR_RISE ** count, quiet)
+        self.noise_floor = max(self.noise_floor, Config.AUDIO_MIN_RMS)
+
+        speech = frame_rms > self.noise_floor * Config.AUDIO_VAD_RATIO
+        voice_ratio = speech.mean(axis=1)
+        voice = voice_ratio >= Config.AUDIO_VAD_MIN_RATIO
+        loud = peak > Config.AUDIO_THRESHOLD
+
+        voice_windows = int(voice.sum())
+        loud_windows = int(loud.sum())
+        self.stats['windows'] += count
+        self.stats['voice_windows'] += voice_windows
+        self.stats['loud_windows'] += loud_windows
+
+        pending = self.pending
+        pending['windows'] += count
+        pending['voice_windows'] += voice_windows
+        pending['loud_windows'] += loud_windows
+        pending['peak'] = max(pending['peak'], int(peak.max()))
+        pending['energy'] += float(np.sum(window_rms * window_rms))
+
+        window_ms = Config.AUDIO_WINDOW_MS
+        first_index = self.processed // self.window_len - count
+        return [
+            {
+                'offset_ms': (first_index + i) * window_ms,
+                'rms': round(float(window_rms[i]), 1),
+                'peak': int(peak[i]),
+                'voice_ratio': round(float(voice_ratio[i]), 3),
+                'voice': bool(voice[i]),
+                'loud': bool(loud[i])
+            }
+            for i in range(count)
+        ]
+
+    def take_pending(self):
+        """Aggregate of the windows analyzed since the last call (None if none)"""
+        pending = self.pending
+        if not pending['windows']:
+            return None
+        self._clear_pending()
+        return {
+            'windows': pending['windows'],
+            'voice_windows': pending['voice_windows'],
+            'loud_windows': pending['loud_windows'],
+            'peak': pending['peak'],
+            'rms': round((pending['energy'] / pending['windows']) ** 0.5, 1)
+        }
+
+    def get_stats(self):
+        return {
+            'sample_rate': self.sample_rate,
+            'seconds_received': round(self.stats['samples'] / self.sample_rate, 2),
+            'noise_floor_rms': round(self.noise_floor, 1) if self.noise_floor is not None else None,
+            **self.stats
+        }
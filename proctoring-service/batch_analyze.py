@@ -0,0 +1,226 @@
+# batch_analyze.py - Offline proctoring analysis of recorded interview videos
+"""
+Re-run proctoring over recorded sessions without going through HTTP:
+
+    python batch_analyze.py recordings/ --output results/ --sample-fps 1
+    python batch_analyze.py a.mp4 b.webm --output results/ --jobs 4 --columnar
+
+Each video is analyzed by its own ProctoringEngine, in its own worker
+process (one per core by default), and written to
+<output>/<name>.ndjson - one JSON analysis per sampled frame, with the
+frame index and video time. For videos found in a directory, <name>
+is the path relative to that directory (sub-directories are mirrored
+under --output), so recordings with the same file name don't collide.
+A finished video also gets <name>.summary.json. Re-running skips finished videos and resumes
+partial ones after the last frame that was written.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mkv', '.avi', '.mov', '.m4v')
+
+logger = logging.getLogger('batch_analyze')
+
+
+def find_videos(paths):
+    """(video path, output name) pairs; the name is relative to the input directory"""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                videos.extend(
+                    (os.path.join(root, f), os.path.relpath(os.path.join(root, f), path))
+                    for f in sorted(files)
+                    if f.lower().endswith(VIDEO_EXTENSIONS)
+                )
+        else:
+            videos.append((path, os.path.basename(path)))
+    return [(video, os.path.splitext(name)[0]) for video, name in videos]
+
+
+def _output_paths(name, output_dir):
+    base = os.path.join(output_dir, name)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    return base + '.ndjson', base + '.summary.json', base + '.npz'
+
+
+def _last_written(ndjson_path):
+    """
+    The last analysis already written (or None), after dropping a
+    partially written final line left by an interrupted run.
+    """
+    if not os.path.exists(ndjson_path):
+        return None
+    with open(ndjson_path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end != len(data):
+            f.truncate(end)
+        lines = data[:end].splitlines()
+    if not lines:
+        return None
+    return json.loads(lines[-1])
+
+
+def _load_log(ndjson_path):
+    """
+    The complete NDJSON log (every run of a resumed video) as an
+    ActivityStore, plus the frame_index / video_time of each entry
+    """
+    from activity_store import ActivityStore
+    
+    with open(ndjson_path) as f:
+        count = sum(1 for line in f if line.strip())
+    store = ActivityStore(capacity=max(1, count))
+    frame_index = np.empty(count, np.int64)
+    video_time = np.empty(count, np.float64)
+    with open(ndjson_path) as f:
+        for i, entry in enumerate(json.loads(line) for line in f if line.strip()):
+            store.append(entry)
+            frame_index[i] = entry['frame_index']
+            video_time[i] = entry['video_time']
+    return store, frame_index, video_time
+
+
+def _write_columnar(npz_path, store, frame_index, video_time):
+    """Write the log as one compressed array per field"""
+    np.savez_compressed(npz_path, frame_index=frame_index, video_time=video_time, **store.columns)
+
+
+def analyze_video(task):
+    """Worker entry point: analyze one video, returns a small status dict"""
+    video_path, name, output_dir, sample_fps, columnar = task
+    from proctoring_engine import ProctoringEngine
+    
+    ndjson_path, summary_path, npz_path = _output_paths(name, output_dir)
+    if os.path.exists(summary_path):
+        return {'video': video_path, 'status': 'skipped'}
+    
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return {'video': video_path, 'status': 'error', 'error': 'cannot open video'}
+    
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, int(round(video_fps / sample_fps))) if sample_fps > 0 else 1
+    
+    last = _last_written(ndjson_path)
+    next_index = 0 if last is None else last['frame_index'] + step
+    if next_index > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, next_index)
+    
+    engine = ProctoringEngine()
+    if last is not None:
+        # blink_count is cumulative, so continue from the interrupted run
+        engine.blink_detector.blink_count = last.get('blink_count', 0)
+    frame_index = next_index
+    analyzed = 0
+    started = time.perf_counter()
+    
+    with open(ndjson_path, 'a') as out:
+        while True:
+            # grab() skips frames without the BGR conversion of read()
+            if not cap.grab():
+                break
+            if (frame_index - next_index) % step == 0:
+                ok, frame = cap.retrieve()
+                if not ok:
+                    break
+                analysis = engine.analyze_frame(frame)
+                analysis['frame_index'] = frame_index
+                analysis['video_time'] = round(frame_index / video_fps, 3)
+                out.write(json.dumps(analysis) + '\n')
+                analyzed += 1
+            frame_index += 1
+    cap.release()
+    
+    elapsed = time.perf_counter() - started
+    video_seconds = (frame_index - next_index) / video_fps
+    
+    # Counters over the whole log, not just this (possibly resumed) run
+    store, frame_indices, video_times = _load_log(ndjson_path)
+    if columnar:
+        _write_columnar(npz_path, store, frame_indices, video_times)
+    
+    summary = {
+        'video': video_path,
+        'resumed_from_frame': next_index,
+        'frames_analyzed': len(store),
+        'frames_analyzed_this_run': analyzed,
+        'video_seconds_processed': round(video_seconds, 2),
+        'elapsed_seconds': round(elapsed, 2),
+        'realtime_factor': round(video_seconds / elapsed, 2) if elapsed else None,
+        'summary': store.summary()
+    }
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    
+    return {'video': video_path, 'status': 'done', **summary}
+
+
+def _init_worker():
+    # One video per process: keep OpenCV from oversubscribing the cores
+    cv2.setNumThreads(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch proctoring analysis of recorded videos')
+    parser.add_argument('inputs', nargs='+', help='video files or directories')
+    parser.add_argument('--output', required=True, help='directory for NDJSON / summary output')
+    parser.add_argument('--sample-fps', type=float, default=1.0,
+                        help='frames per second of video to analyze (0 = every frame)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='videos processed in parallel')
+    parser.add_argument('--columnar', action='store_true',
+                        help='also write <name>.npz with one array per field')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    os.makedirs(args.output, exist_ok=True)
+    
+    videos = find_videos(args.inputs)
+    if not videos:
+        logger.error("No videos found")
+        return 1
+    
+    # Same relative name from two inputs would share (and corrupt) one output
+    sources = {}
+    for video, name in videos:
+        sources.setdefault(name, []).append(video)
+    clashes = {name: paths for name, paths in sources.items() if len(paths) > 1}
+    if clashes:
+        for name, paths in sorted(clashes.items()):
+            logger.error("Output name %r used by several videos: %s", name, ', '.join(paths))
+        return 1
+    
+    # Load models once here so forked workers share them
+    from model_registry import get_model_registry
+    get_model_registry().warm_up()
+    
+    tasks = [(video, name, args.output, args.sample_fps, args.columnar) for video, name in videos]
+    jobs = max(1, min(args.jobs, len(tasks)))
+    failed = 0
+    
+    with multiprocessing.get_context('fork').Pool(jobs, initializer=_init_worker) as pool:
+        for result in pool.imap_unordered(analyze_video, tasks):
+            if result['status'] == 'done':
+                logger.info("%s: %d frames, %.1fx real time",
+                            result['video'], result['frames_analyzed'], result['realtime_factor'] or 0)
+            elif result['status'] == 'skipped':
+                logger.info("%s: already finished, skipped", result['video'])
+            else:
+                failed += 1
+                logger.error("%s: %s", result['video'], result['error'])
+    
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+# benchmarks/bench_pipeline.py - Per-detector and end-to-end pipeline benchmark
+"""
+Run from the proctoring-service directory:
+
+    python -m benchmarks.bench_pipeline --output results.json
+    python -m benchmarks.bench_pipeline --compare baseline.json
+
+Every detector is timed in isolation on each synthetic scenario
+(resolution x face count x phone), then ProctoringEngine.analyze_frame
+is timed end to end. Results are written as JSON so runs from different
+commits can be compared.
+"""
+import argparse
+import gc
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import cv2
+import numpy as np
+from config import Config
+from detectors.frame_context import FrameContext
+from detectors.face_detector import FaceDetector
+from detectors.eye_locator import EyeLocator
+from detectors.eye_gaze_detector import EyeGazeDetector
+from detectors.head_pose_detector import HeadPoseDetector
+from detectors.object_detector import ObjectDetector
+from detectors.blink_detector import BlinkDetector
+from model_registry import get_model_registry
+from proctoring_engine import ProctoringEngine
+from benchmarks.frames import RESOLUTIONS, load_frames, scenarios
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def summarize(samples):
+    """Latency percentiles (ms) and single-core throughput for a list of seconds"""
+    ms = np.asarray(samples) * 1000
+    mean = float(ms.mean())
+    return {
+        'iterations': len(ms),
+        'mean_ms': round(mean, 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        # Everything here runs on one thread, so this is frames/sec per core
+        'fps_per_core': round(1000 / mean, 2) if mean else None
+    }
+
+
+def time_call(fn, iterations, warmup):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_detectors(name, frame, iterations, warmup):
+    """Time each stage on its own, against a context that already has faces/eyes"""
+    face_detector = FaceDetector()
+    face_detector.tracking_enabled = False
+    eye_locator = EyeLocator()
+    gaze = EyeGazeDetector()
+    head_pose = HeadPoseDetector()
+    objects = ObjectDetector()
+    blink = BlinkDetector()
+
+    ctx = FrameContext(frame)
+    face_detector.detect(ctx)
+    eye_locator.detect(ctx)
+
+    stages = {
+        'prepare': lambda: FrameContext(frame),
+        'face': lambda: face_detector.detect(ctx),
+        'eyes': lambda: eye_locator.detect(ctx),
+        'gaze': lambda: gaze.detect(ctx),
+        'head_pose': lambda: head_pose.detect(ctx),
+        'blink': lambda: blink.detect(ctx),
+    }
+    if objects.net is not None:
+        stages['yolo'] = lambda: objects.detect_detailed(ctx)
+
+    results = []
+    for stage, fn in stages.items():
+        results.append({
+            'scenario': name,
+            'benchmark': stage,
+            'faces_found': len(ctx.faces),
+            **summarize(time_call(fn, iterations, warmup))
+        })
+    return results
+
+
+def allocations(fn, iterations):
+    """
+    Memory allocated per call, traced separately from the timed runs
+    (tracing slows everything down). NumPy and OpenCV output arrays are
+    included; OpenCV's internal scratch memory is not.
+    """
+    gc.collect()
+    collections_before = sum(stat['collections'] for stat in gc.get_stats())
+    tracemalloc.start()
+    try:
+        peaks, retained = [], []
+        for _ in range(iterations):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn()
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        # Largest amount of memory alive at once during a call, above what was live before it
+        'alloc_peak_kb': round(float(np.mean(peaks)) / 1024, 1),
+        'alloc_retained_kb': round(float(np.mean(retained)) / 1024, 1),
+        'gc_collections': sum(stat['collections'] for stat in gc.get_stats()) - collections_before
+    }
+
+
+def bench_engine(name, frame, iterations, warmup):
+    """End-to-end analyze_frame on a fresh session fed the same frame repeatedly"""
+    engine = ProctoringEngine()
+    analysis = engine.analyze_frame(frame)
+    samples = time_call(lambda: engine.analyze_frame(frame), iterations, warmup)
+    return {
+        'scenario': name,
+        'benchmark': 'analyze_frame',
+        'faces_found': analysis['faces_count'],
+        'objects_found': analysis['detected_objects'],
+        **summarize(samples),
+        **allocations(lambda: engine.analyze_frame(frame), iterations)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline_path):
+    """Print p50/p95 changes against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {(r['scenario'], r['benchmark']): r for r in baseline['results']}
+    print(f"{'scenario':32} {'benchmark':14} {'p50 ms':>18} {'p95 ms':>18}")
+    for r in current['results']:
+        old = before.get((r['scenario'], r['benchmark']))
+        if old is None:
+            continue
+        cells = []
+        for key in ('p50_ms', 'p95_ms'):
+            change = (r[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            cells.append(f"{old[key]:7.2f}->{r[key]:7.2f} {change:+4.0f}%")
+        print(f"{r['scenario']:32} {r['benchmark']:14} {cells[0]:>18} {cells[1]:>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the proctoring pipeline')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--resolutions', nargs='*', default=None,
+                        help='e.g. 640x480 1280x720 (default: all of %s)' % RESOLUTIONS)
+    parser.add_argument('--frames-dir', help='benchmark these images instead of synthetic frames')
+    parser.add_argument('--skip-detectors', action='store_true', help='only run end to end')
+    parser.add_argument('--frame-reuse', action='store_true',
+                        help='keep the near-duplicate frame cache on (every iteration repeats the same frame)')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    parser.add_argument('--compare', help='previous results JSON to compare against')
+    args = parser.parse_args()
+
+    Config.FRAME_REUSE_ENABLED = args.frame_reuse
+
+    registry = get_model_registry()
+    registry.warm_up()
+
+    if args.frames_dir:
+        frames = list(load_frames(args.frames_dir))
+    else:
+        resolutions = [tuple(int(v) for v in r.split('x')) for r in args.resolutions] if args.resolutions else None
+        frames = list(scenarios(resolutions))
+
+    results = []
+    for name, frame in frames:
+        if not args.skip_detectors:
+            results.extend(bench_detectors(name, frame, args.iterations, args.warmup))
+        results.append(bench_engine(name, frame, args.iterations, args.warmup))
+        print(f"done: {name}", file=sys.stderr)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'cpu_count': cv2.getNumberOfCPUs(),
+        'opencv_threads': cv2.getNumThreads(),
+        'yolo_available': registry.yolo_net is not None,
+        'config': {
+            'face_tracking': Config.FACE_TRACKING_ENABLED,
+            'object_detection_policy': Config.OBJECT_DETECTION_POLICY,
+            'parallel_detectors': Config.PARALLEL_DETECTORS,
+            'frame_reuse': Config.FRAME_REUSE_ENABLED,
+            'profile': Config.PERFORMANCE_PROFILE,
+            'processing_max_size': [Config.PROCESSING_MAX_WIDTH, Config.PROCESSING_MAX_HEIGHT]
+        },
+        'peak_rss_mb': peak_rss_mb(),
+        'results': results
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
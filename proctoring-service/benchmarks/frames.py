@@ -0,0 +1,64 @@
+# benchmarks/frames.py - Deterministic synthetic frames for benchmarking
+import os
+import cv2
+import numpy as np
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+FACE_COUNTS = [0, 1, 2]
+
+
+def _draw_face(img, cx, cy, size):
+    """Cartoon frontal face that the Haar face + eye cascades pick up"""
+    half_w, half_h = int(size * 0.36), int(size * 0.46)
+    cv2.ellipse(img, (cx, cy), (half_w, half_h), 0, 0, 360, (150, 175, 205), -1)
+    top = cy - size // 2
+    for side in (-1, 1):
+        ex = cx + side * int(size * 0.16)
+        cv2.ellipse(img, (ex, top + int(size * 0.36)), (int(size * 0.09), int(size * 0.03)), 0, 0, 360, (40, 40, 50), -1)
+        cv2.ellipse(img, (ex, top + int(size * 0.43)), (int(size * 0.07), int(size * 0.035)), 0, 0, 360, (250, 250, 250), -1)
+        cv2.circle(img, (ex, top + int(size * 0.43)), int(size * 0.025), (30, 20, 20), -1)
+    cv2.ellipse(img, (cx, top + int(size * 0.56)), (int(size * 0.04), int(size * 0.08)), 0, 0, 360, (120, 140, 170), -1)
+    cv2.ellipse(img, (cx, top + int(size * 0.70)), (int(size * 0.12), int(size * 0.03)), 0, 0, 360, (70, 60, 140), -1)
+
+
+def _draw_phone(img, x, y, h):
+    """Dark rounded slab with a lit screen"""
+    w = int(h * 0.5)
+    cv2.rectangle(img, (x, y), (x + w, y + h), (20, 20, 20), -1)
+    cv2.rectangle(img, (x + w // 12, y + h // 12), (x + w - w // 12, y + h - h // 12), (210, 170, 90), -1)
+
+
+def make_frame(width, height, faces=1, phone=False, seed=0):
+    """Build one BGR frame: textured background, `faces` faces, optional phone"""
+    rng = np.random.default_rng(seed)
+    img = np.empty((height, width, 3), np.uint8)
+    img[:] = (70, 80, 90)
+    noise = rng.integers(0, 25, size=(height // 8, width // 8, 3), dtype=np.uint8)
+    img += cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR)
+
+    size = int(height * 0.4)
+    centers = {0: [], 1: [width // 2], 2: [width // 3, 2 * width // 3]}[faces]
+    for cx in centers:
+        _draw_face(img, cx, height // 2, size)
+
+    if phone:
+        _draw_phone(img, int(width * 0.06), int(height * 0.55), int(height * 0.3))
+
+    return cv2.GaussianBlur(img, (0, 0), max(1.0, height / 480))
+
+
+def scenarios(resolutions=None):
+    """Yield (name, frame) for every resolution x face count x phone combination"""
+    for width, height in resolutions or RESOLUTIONS:
+        for faces in FACE_COUNTS:
+            for phone in (False, True):
+                name = f'{width}x{height}-faces{faces}-{"phone" if phone else "nophone"}'
+                yield name, make_frame(width, height, faces, phone, seed=width + faces)
+
+
+def load_frames(directory):
+    """Yield (name, frame) for every image in a directory, sorted by file name"""
+    for file_name in sorted(os.listdir(directory)):
+        frame = cv2.imread(os.path.join(directory, file_name), cv2.IMREAD_COLOR)
+        if frame is not None:
+            yield os.path.splitext(file_name)[0], frame
@@ -0,0 +1,147 @@
+# benchmarks/load_test.py - HTTP load generator for /analyze-frame
+"""
+Start the service, then from the proctoring-service directory:
+
+    python -m benchmarks.load_test --sessions 50 --fps 1 --duration 60
+    python -m benchmarks.load_test --sessions 8 --fps 0 --mode binary --output load.json
+
+Each synthetic session is a thread posting frames at --fps (0 = back to
+back) under its own session_id. Client-side latency percentiles,
+throughput and error counts are reported as JSON.
+"""
+import argparse
+import base64
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+import cv2
+import numpy as np
+from benchmarks.frames import make_frame
+from benchmarks.bench_pipeline import git_commit, summarize
+
+
+def encode_frames(width, height, count, quality):
+    """A few different JPEGs per session so caches see realistic input"""
+    frames = []
+    for i in range(count):
+        frame = make_frame(width, height, faces=1, phone=(i % 4 == 3), seed=i)
+        ok, jpg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        frames.append(jpg.tobytes())
+    return frames
+
+
+def build_request(base_url, mode, session_id, jpg):
+    if mode == 'binary':
+        return urllib.request.Request(
+            f'{base_url}/analyze-frame/binary?session_id={session_id}',
+            data=jpg, headers={'Content-Type': 'image/jpeg'}, method='POST'
+        )
+    body = json.dumps({
+        'session_id': session_id,
+        'frame': 'data:image/jpeg;base64,' + base64.b64encode(jpg).decode('ascii')
+    }).encode('utf-8')
+    return urllib.request.Request(
+        f'{base_url}/analyze-frame', data=body,
+        headers={'Content-Type': 'application/json'}, method='POST'
+    )
+
+
+def run_session(index, args, frames, deadline, results):
+    session_id = f'{args.session_prefix}-{index}'
+    interval = 1.0 / args.fps if args.fps > 0 else 0.0
+    latencies, errors = [], {}
+    next_send = time.monotonic()
+    n = 0
+
+    while time.monotonic() < deadline:
+        if interval:
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_send += interval
+
+        request = build_request(args.url, args.mode, session_id, frames[n % len(frames)])
+        n += 1
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=args.timeout) as response:
+                response.read()
+            latencies.append(time.perf_counter() - started)
+        except urllib.error.HTTPError as e:
+            errors[str(e.code)] = errors.get(str(e.code), 0) + 1
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    results[index] = (latencies, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the proctoring service')
+    parser.add_argument('--url', default='http://localhost:5001')
+    parser.add_argument('--sessions', type=int, default=10, help='concurrent synthetic sessions')
+    parser.add_argument('--fps', type=float, default=1.0, help='frames/sec per session (0 = no pacing)')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds')
+    parser.add_argument('--mode', choices=['json', 'binary'], default='json')
+    parser.add_argument('--resolution', default='640x480')
+    parser.add_argument('--quality', type=int, default=80, help='JPEG quality')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--session-prefix', default='load')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.resolution.split('x'))
+    frames = encode_frames(width, height, 8, args.quality)
+
+    results = [None] * args.sessions
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=run_session, args=(i, args, frames, deadline, results), daemon=True)
+        for i in range(args.sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies = [lat for session in results for lat in session[0]]
+    errors = {}
+    for _, session_errors in results:
+        for key, count in session_errors.items():
+            errors[key] = errors.get(key, 0) + count
+
+    latency = summarize(latencies) if latencies else None
+    if latency:
+        # Per-core throughput is meaningless from the client side
+        del latency['fps_per_core']
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'url': args.url,
+        'mode': args.mode,
+        'sessions': args.sessions,
+        'target_fps_per_session': args.fps,
+        'resolution': args.resolution,
+        'frame_bytes_avg': int(np.mean([len(f) for f in frames])),
+        'duration_s': round(elapsed, 2),
+        'completed': len(latencies),
+        'errors': errors,
+        'throughput_fps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'latency': latency
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,94 @@ class Config:
     GAZE_RATIO_THRESHOLD = 1.2
     HEAD_POSE_ANGLE_THRESHOLD = 15
     YOLO_CONFIDENCE_THRESHOLD = 0.5
+    YOLO_NMS_THRESHOLD = 0.4
     AUDIO_THRESHOLD = 2000
     
+    # Streamed audio (16-bit mono PCM per session)
+    AUDIO_SAMPLE_RATE = 16000               # default when the client doesn't say
+    AUDIO_WINDOW_MS = 500                   # features / flags per window
+    AUDIO_FRAME_MS = 20                     # sub-frames for voice activity
+    AUDIO_BUFFER_SECONDS = 2                # ring buffer per session
+    AUDIO_MIN_RMS = 50                      # lowest noise floor (int16 RMS)
+    AUDIO_NOISE_FLOOR_RISE = 1.02           # max noise floor growth per window
+    AUDIO_VAD_RATIO = 3.0                   # speech frame = RMS above floor * ratio (~10 dB)
+    AUDIO_VAD_MIN_RATIO = 0.3               # share of speech frames for a 'voice' window
+    AUDIO_FLAG_VOICE = False                # also flag plain speech (e.g. silent assessments)
+    
     # Suspicious objects list
     SUSPICIOUS_OBJECTS = ['cell phone', 'book', 'laptop', 'person', 'remote']
+    
+    # Frames larger than this are downscaled once before detection
+    # (working size of the 'accurate' profile)
+    PROCESSING_MAX_WIDTH = 800
+    PROCESSING_MAX_HEIGHT = 600
+    
+    # Performance profile: 'accurate' | 'balanced' | 'fast' (see profiles.py)
+    PERFORMANCE_PROFILE = os.environ.get('PROCTORING_PROFILE', 'accurate')
+    
+    # Load shedding: step down to cheaper profiles while saturated
+    LOAD_SHEDDING_ENABLED = True
+    LOAD_SHED_MAX_INFLIGHT = 8              # analyses in flight + queued before stepping down
+    LOAD_SHED_LATENCY_MS = 500              # average frame latency before stepping down
+    LOAD_SHED_COOLDOWN_SECONDS = 10         # calm period before stepping back up
+    
+    # Capture cadence recommended to clients with every analysis
+    CAPTURE_INTERVAL_MS = 1000              # normal cadence
+    CAPTURE_INTERVAL_ALERT_MS = 500         # right after a violation
+    CAPTURE_INTERVAL_CALM_MS = 2000         # after a long quiet stretch
+    CAPTURE_INTERVAL_MAX_MS = 5000          # cap when backing off under load
+    CAPTURE_ALERT_SECONDS = 10              # how long "right after a violation" lasts
+    CAPTURE_CALM_SECONDS = 60               # quiet this long counts as calm
+    
+    # Face tracking: between keyframes only search around the last face
+    FACE_TRACKING_ENABLED = True
+    FACE_TRACKING_KEYFRAME_INTERVAL = 5     # full detection at least every N frames
+    FACE_TRACKING_ROI_PADDING = 0.5         # search window = box grown by this fraction per side
+    
+    # Object detection cadence: 'every_frame' | 'fixed' | 'adaptive'
+    OBJECT_DETECTION_POLICY = 'adaptive'
+    OBJECT_DETECTION_INTERVAL = 3           # run YOLO at least every N frames
+    OBJECT_DETECTION_MOTION_THRESHOLD = 12  # mean thumbnail diff (0-255) that forces a run
+    OBJECT_DETECTION_CONFIRM_RUNS = 2       # back-to-back runs after a new label appears
+    
+    # Near-duplicate frames: reuse the last analysis instead of re-running detectors
+    FRAME_REUSE_ENABLED = True
+    FRAME_REUSE_MEAN_THRESHOLD = 1.5        # mean 32x24 thumbnail diff (0-255)
+    FRAME_REUSE_PIXEL_THRESHOLD = 20        # largest single-cell diff (catches small local changes)
+    FRAME_REUSE_MAX_FRAMES = 5              # consecutive reuses before a forced full analysis
+    FRAME_REUSE_MAX_SECONDS = 5.0           # oldest analysis that may be reused
+    
+    # Cross-session YOLO batching
+    YOLO_BATCHING_ENABLED = False
+    YOLO_BATCH_SIZE = 8                     # max images per forward pass
+    YOLO_BATCH_MAX_WAIT_MS = 5              # how long the first image waits for others
+    
+    # Per-session activity log: entries kept in memory (older ones are
+    # overwritten; summary counters still cover the whole session)
+    ACTIVITY_LOG_CAPACITY = 7200            # 2 hours at 1 frame/sec
+    ACTIVITY_LOG_PAGE_SIZE = 500            # Entries per fetch when streaming NDJSON
+    
+    # Rolling per-session aggregates over fixed time windows
+    AGGREGATE_WINDOWS = [10, 60]            # window sizes in seconds
+    AGGREGATE_HISTORY = 60                  # closed windows kept per size
+    AGGREGATE_PUSH_INTERVAL_MS = 1000       # how often the push feed checks for new windows
+    
+    # Session registry limits
+    SESSION_IDLE_TTL_SECONDS = 1800         # evict sessions idle this long (0 = never)
+    MAX_SESSIONS = 500                      # LRU eviction above this count (0 = unlimited)
+    SESSION_MEMORY_BUDGET_MB = 256          # LRU eviction above this estimate (0 = unlimited)
+    SESSION_EVICTION_FLUSH_DIR = None       # write evicted sessions' logs here as NDJSON
+    
+    # Durable session journal: persist every analysis and reload sessions after a restart
+    SESSION_JOURNAL_DIR = os.environ.get('PROCTORING_JOURNAL_DIR')  # None = memory only
+    SESSION_JOURNAL_SEGMENT_RECORDS = 3600  # records per segment file (1 hour at 1 frame/sec)
+    SESSION_JOURNAL_FLUSH_INTERVAL_MS = 1000  # batch writes + fsync this often
+    SESSION_JOURNAL_RETENTION_SECONDS = 7 * 24 * 3600  # delete journals untouched this long (0 = keep forever)
+    
+    # Run the face chain and YOLO concurrently (OpenCV releases the GIL)
+    PARALLEL_DETECTORS = False
+    DETECTOR_THREADS = 4                    # shared by all sessions in a process
+    FRAME_DEADLINE_MS = 0                   # return partial results after this (0 = wait)
+    
+    # Logging (DEBUG adds one line per analyzed frame)
+    LOG_LEVEL = os.environ.get('PROCTORING_LOG_LEVEL', 'INFO')
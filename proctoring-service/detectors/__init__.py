@@ -1,16 +1,20 @@
 # detectors/__init__.py
 from .face_detector import FaceDetector
+from .eye_locator import EyeLocator
 from .eye_gaze_detector import EyeGazeDetector
 from .head_pose_detector import HeadPoseDetector
 from .object_detector import ObjectDetector
 from .blink_detector import BlinkDetector
 from .audio_detector import AudioDetector
+from .frame_context import FrameContext
 
 __all__ = [
     'FaceDetector',
+    'EyeLocator',
     'EyeGazeDetector',
     'HeadPoseDetector',
     'ObjectDetector',
     'BlinkDetector',
-    'AudioDetector'
+    'AudioDetector',
+    'FrameContext'
 ]
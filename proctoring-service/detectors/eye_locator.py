@@ -0,0 +1,43 @@
+# detectors/eye_locator.py - One eye-detection pass per frame
+import logging
+from model_registry import get_model_registry
+
+logger = logging.getLogger(__name__)
+
+class EyeLocator:
+    """
+    Runs the eye cascade once over every face ROI and stores the boxes
+    on the frame context. Gaze and blink analysis both read ctx.eyes,
+    so the two always agree on what eyes were seen.
+    """
+    def __init__(self, models=None):
+        # Eye cascade is shared read-only across all sessions
+        models = models or get_model_registry()
+        self.eye_cascade = models.eye_cascade
+    
+    def detect(self, ctx):
+        """
+        Locate eyes inside each detected face
+        Returns: list of eye boxes per face (relative to the face ROI),
+        or None if the eye cascade is unavailable
+        """
+        if self.eye_cascade is None:
+            ctx.eyes = None
+            return None
+        
+        eyes_per_face = []
+        try:
+            for face_region in ctx.face_rois():
+                eyes = self.eye_cascade.detectMultiScale(
+                    face_region,
+                    scaleFactor=ctx.profile['eye_scale_factor'],
+                    minNeighbors=5,
+                    minSize=(10, 10)
+                )
+                eyes_per_face.append(eyes)
+        except Exception as e:
+            logger.error("Error in eye detection: %s", e)
+            eyes_per_face = None
+        
+        ctx.eyes = eyes_per_face
+        return eyes_per_face
@@ -1,97 +1,140 @@
 # detectors/face_detector.py - OpenCV Version
 import cv2
+import logging
 import os
+import time
+from config import Config
+from metrics import metrics
+from model_registry import get_model_registry
+
+logger = logging.getLogger(__name__)
 
 class FaceDetector:
-    def __init__(self):
-        try:
-            print(f"Loading OpenCV face detector...")
-            
-            # Load OpenCV's pre-trained Haar cascade
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
-            
-            if self.face_cascade.empty():
-                raise Exception("Failed to load OpenCV face cascade")
-            
-            print(f"OpenCV face detector loaded successfully")
-            
-        except Exception as e:
-            print(f"Error initializing FaceDetector: {e}")
-            raise e
-    
-    def _resize_frame_if_needed(self, frame, max_width=800, max_height=600):
-        """Resize frame if it's too large for processing"""
-        height, width = frame.shape[:2]
-        
-        if width <= max_width and height <= max_height:
-            return frame, 1.0
+    def __init__(self, models=None):
+        # Cascade is shared read-only across all sessions
+        models = models or get_model_registry()
+        self.face_cascade = models.face_cascade
         
-        scale_width = max_width / width
-        scale_height = max_height / height
-        scale = min(scale_width, scale_height)
+        # Per-session tracking state
+        self.tracking_enabled = Config.FACE_TRACKING_ENABLED
+        self.last_box = None                # (x, y, w, h) in working coordinates
+        self.frames_since_keyframe = 0
+        self.reset_stats()
+    
+    def reset_stats(self):
+        self.stats = {
+            'keyframes': 0,
+            'tracked_frames': 0,
+            'track_misses': 0,
+            'keyframe_ms_total': 0.0,
+            'tracked_ms_total': 0.0
+        }
+    
+    def reset_tracking(self):
+        self.last_box = None
+        self.frames_since_keyframe = 0
+    
+    def get_stats(self):
+        """Tracking hit rate and average per-frame detection time"""
+        stats = self.stats
+        attempts = stats['tracked_frames'] + stats['track_misses']
+        return {
+            'tracking_enabled': self.tracking_enabled,
+            'keyframe_interval': Config.FACE_TRACKING_KEYFRAME_INTERVAL,
+            'keyframes': stats['keyframes'],
+            'tracked_frames': stats['tracked_frames'],
+            'track_misses': stats['track_misses'],
+            'hit_rate': round(stats['tracked_frames'] / attempts, 4) if attempts else 0.0,
+            'avg_keyframe_ms': round(stats['keyframe_ms_total'] / stats['keyframes'], 3) if stats['keyframes'] else 0.0,
+            'avg_tracked_ms': round(stats['tracked_ms_total'] / stats['tracked_frames'], 3) if stats['tracked_frames'] else 0.0
+        }
+    
+    def _detect_full(self, gray, scale_factor):
+        return self.face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=scale_factor,
+            minNeighbors=5,
+            minSize=(30, 30),
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+    
+    def _detect_tracked(self, gray, scale_factor):
+        """
+        Search only a padded window around the last face box.
+        Returns the new box in working coordinates, or None if the
+        track is lost (no face, or more than one face, in the window).
+        """
+        x, y, w, h = self.last_box
+        pad_x = int(w * Config.FACE_TRACKING_ROI_PADDING)
+        pad_y = int(h * Config.FACE_TRACKING_ROI_PADDING)
+        img_h, img_w = gray.shape[:2]
         
-        new_width = int(width * scale)
-        new_height = int(height * scale)
+        x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+        x1, y1 = min(img_w, x + w + pad_x), min(img_h, y + h + pad_y)
+        roi = gray[y0:y1, x0:x1]
         
-        resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
-        print(f"Resized image from {width}x{height} to {new_width}x{new_height}")
+        # The face can't have changed size much since the last frame
+        min_side = max(30, int(min(w, h) * 0.6))
+        faces = self.face_cascade.detectMultiScale(
+            roi,
+            scaleFactor=scale_factor,
+            minNeighbors=5,
+            minSize=(min_side, min_side),
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+        if len(faces) != 1:
+            return None
         
-        return resized, scale
+        fx, fy, fw, fh = faces[0]
+        return (int(fx) + x0, int(fy) + y0, int(fw), int(fh))
     
-    def detect(self, frame):
+    def detect(self, ctx):
         """
-        Detect faces using OpenCV Haar Cascades
+        Detect faces using OpenCV Haar Cascades on the context's
+        grayscale working frame, and record them on the context.
+
+        With tracking enabled, a frame that follows a single-face
+        keyframe only searches a padded window around the last face.
+        Full-frame detection runs again when the track is lost or every
+        FACE_TRACKING_KEYFRAME_INTERVAL frames, which is also how a
+        second person entering the frame is picked up.
         Returns: (status, faces)
         """
         try:
-            if frame is None:
+            if ctx is None or ctx.frame is None:
                 return "no_frame", []
             
-            if frame.dtype != 'uint8':
-                frame = frame.astype('uint8')
+            started = time.perf_counter()
+            scale_factor = ctx.profile['face_scale_factor']
+            boxes = None
             
-            # Resize if needed
-            processed_frame, scale_factor = self._resize_frame_if_needed(frame)
+            if (self.tracking_enabled and self.last_box is not None
+                    and self.frames_since_keyframe < Config.FACE_TRACKING_KEYFRAME_INTERVAL):
+                box = self._detect_tracked(ctx.gray, scale_factor)
+                if box is not None:
+                    boxes = [box]
+                    self.last_box = box
+                    self.frames_since_keyframe += 1
+                    self.stats['tracked_frames'] += 1
+                    self.stats['tracked_ms_total'] += (time.perf_counter() - started) * 1000
+                    metrics.inc('proctoring_face_detection_total', mode='tracked')
+                else:
+                    self.stats['track_misses'] += 1
+                    metrics.inc('proctoring_face_detection_total', mode='track_lost')
             
-            # Convert to grayscale
-            if len(processed_frame.shape) == 3:
-                gray = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = processed_frame
+            if boxes is None:
+                # Keyframe: full multi-scale detection
+                boxes = self._detect_full(ctx.gray, scale_factor)
+                self.last_box = tuple(int(v) for v in boxes[0]) if len(boxes) == 1 else None
+                self.frames_since_keyframe = 0
+                self.stats['keyframes'] += 1
+                self.stats['keyframe_ms_total'] += (time.perf_counter() - started) * 1000
+                metrics.inc('proctoring_face_detection_total', mode='keyframe')
             
-            if gray.dtype != 'uint8':
-                gray = gray.astype('uint8')
-            
-            print(f"Processing frame: shape={gray.shape}, dtype={gray.dtype}")
-            
-            # Detect faces using OpenCV
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30),
-                flags=cv2.CASCADE_SCALE_IMAGE
-            )
-            
-            face_count = len(faces)
-            print(f"OpenCV face detection completed: found {face_count} faces")
-            
-            # Convert to list of face rectangles (compatible format)
-            face_rects = []
-            for (x, y, w, h) in faces:
-                # Scale back to original size if needed
-                if scale_factor != 1.0:
-                    x = int(x / scale_factor)
-                    y = int(y / scale_factor)
-                    w = int(w / scale_factor)
-                    h = int(h / scale_factor)
-                
-                # Create a simple rectangle object
-                face_rects.append({
-                    'x': x, 'y': y, 'w': w, 'h': h,
-                    'left': x, 'top': y, 'right': x + w, 'bottom': y + h
-                })
+            # Store boxes (scaled back to original size) on the context
+            ctx.set_faces(boxes)
+            face_rects = ctx.faces
+            face_count = len(face_rects)
             
             if face_count > 1:
                 return "multiple_faces", face_rects
@@ -101,14 +144,13 @@ class FaceDetector:
                 return "normal", face_rects
                 
         except Exception as e:
-            print(f"Error in OpenCV face detection: {e}")
-            import traceback
-            print(traceback.format_exc())
+            logger.exception("Error in OpenCV face detection: %s", e)
+            self.reset_tracking()
             return "error", []
     
     def get_landmarks(self, frame, face):
         """
         Placeholder for landmarks (OpenCV doesn't provide landmarks directly)
         """
-        print("Note: Landmark detection not available with OpenCV face detector")
+        logger.debug("Landmark detection not available with OpenCV face detector")
         return None
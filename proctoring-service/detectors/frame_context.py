@@ -0,0 +1,173 @@
+# detectors/frame_context.py - Per-frame data shared by all detectors
+import threading
+import cv2
+import numpy as np
+from profiles import get_profile
+
+
+class FrameBuffers:
+    """
+    Scratch arrays reused from frame to frame (working copy, grayscale,
+    YOLO input). An array is only reallocated when the shape it's asked
+    for changes, so a steady stream of same-size frames allocates
+    nothing here after the first one.
+    """
+    def __init__(self):
+        self._arrays = {}
+    
+    def get(self, name, shape, dtype=np.uint8):
+        array = self._arrays.get(name)
+        if array is None or array.shape != shape or array.dtype != dtype:
+            array = self._arrays[name] = np.empty(shape, dtype)
+        return array
+    
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays.values())
+
+
+class FrameBufferPool:
+    """
+    Process-wide FrameBuffers, checked out by a frame for as long as its
+    detectors read from them. Memory grows with the number of frames in
+    flight, not with the number of sessions, and is not charged to any
+    session's memory estimate.
+    """
+    def __init__(self):
+        self._free = []
+        self._lock = threading.Lock()
+        self.created = 0
+    
+    def acquire(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self.created += 1
+        return FrameBuffers()
+    
+    def release(self, buffers):
+        with self._lock:
+            self._free.append(buffers)
+    
+    def release_after(self, buffers, futures):
+        """Release once every future (stages still reading the buffers) is done"""
+        remaining = [len(futures)]
+        lock = threading.Lock()
+        
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self.release(buffers)
+        
+        for future in futures:
+            future.add_done_callback(done)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'buffer_sets': self.created,
+                'idle_buffer_sets': len(self._free),
+                'idle_buffer_bytes': sum(buffers.nbytes for buffers in self._free)
+            }
+
+
+# Shared by every session in this process
+frame_buffer_pool = FrameBufferPool()
+
+
+class FrameContext:
+    """
+    Everything the detectors need from a single frame, computed once:
+    the decoded BGR frame, a working copy capped to the processing size,
+    its grayscale version and the scale between the two. FaceDetector
+    fills in the face boxes; the eye stage gets its face ROIs from here
+    (face_rois). `profile` (profiles.get_profile) holds the detector
+    settings for this frame. With `buffers` (FrameBuffers) the working
+    copy and grayscale image are written into those reusable arrays
+    instead of fresh ones; they stay valid until the buffers are
+    released to the pool.
+    """
+    def __init__(self, frame, profile=None, buffers=None):
+        if frame.dtype != 'uint8':
+            frame = frame.astype('uint8')
+        
+        self.frame = frame
+        self.height, self.width = frame.shape[:2]
+        self.profile = profile or get_profile('accurate')
+        self.buffers = buffers
+        
+        # Working copy (resized if needed) + grayscale
+        self.working, self.scale = self._resize_frame_if_needed(
+            frame, self.profile['max_width'], self.profile['max_height']
+        )
+        if len(self.working.shape) == 3:
+            dst = buffers.get('gray', self.working.shape[:2]) if buffers is not None else None
+            self.gray = cv2.cvtColor(self.working, cv2.COLOR_BGR2GRAY, dst=dst)
+        else:
+            self.gray = self.working
+        
+        # Filled in by FaceDetector
+        self.faces = []         # face dicts in original frame coordinates
+        self.face_boxes = []    # (x, y, w, h) in working/gray coordinates
+        
+        # Filled in by EyeLocator: eye boxes per face, relative to its ROI
+        self.eyes = []
+    
+    def _resize_frame_if_needed(self, frame, max_width, max_height):
+        """Resize frame if it's too large for processing"""
+        height, width = frame.shape[:2]
+        
+        if width <= max_width and height <= max_height:
+            return frame, 1.0
+        
+        scale_width = max_width / width
+        scale_height = max_height / height
+        scale = min(scale_width, scale_height)
+        
+        new_width = int(width * scale)
+        new_height = int(height * scale)
+        
+        dst = None
+        if self.buffers is not None:
+            dst = self.buffers.get('working', (new_height, new_width) + frame.shape[2:])
+        resized = cv2.resize(frame, (new_width, new_height), dst=dst, interpolation=cv2.INTER_AREA)
+        return resized, scale
+    
+    def set_faces(self, boxes):
+        """Record detected faces given as (x, y, w, h) in working coordinates"""
+        self.face_boxes = [tuple(int(v) for v in box) for box in boxes]
+        self.faces = []
+        for (x, y, w, h) in self.face_boxes:
+            # Scale back to original size if needed
+            if self.scale != 1.0:
+                x = int(x / self.scale)
+                y = int(y / self.scale)
+                w = int(w / self.scale)
+                h = int(h / self.scale)
+            
+            self.faces.append({
+                'x': x, 'y': y, 'w': w, 'h': h,
+                'left': x, 'top': y, 'right': x + w, 'bottom': y + h
+            })
+    
+    def face_rois(self):
+        """
+        Full-resolution grayscale crops of every detected face, for the
+        eye cascade. Eyes are searched at the frame's own resolution (as
+        before the working copy existed), so downscaling for face
+        detection doesn't change gaze/blink verdicts. Only the face
+        regions are converted, not the whole frame.
+        """
+        if self.scale == 1.0:
+            # Working copy is the frame itself: views, no copies
+            return [self.gray[y:y+h, x:x+w] for (x, y, w, h) in self.face_boxes]
+
+        rois = []
+        for face in self.faces:
+            region = self.frame[face['top']:face['bottom'], face['left']:face['right']]
+            if region.ndim == 3:
+                region = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+            rois.append(region)
+        return rois
@@ -1,24 +1,28 @@
 # detectors/head_pose_detector.py - Simplified
+import logging
 import cv2
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 class HeadPoseDetector:
     def __init__(self):
-        print("Head pose detector initialized (simplified version)")
+        # Stateless - nothing to load
+        pass
     
-    def detect(self, faces, frame):
+    def detect(self, ctx):
         """
         Simple head pose detection based on face position
         Returns: 'normal' | 'head_turned' | 'no_face'
         """
-        if len(faces) == 0:
+        if len(ctx.faces) == 0:
             return "no_face"
         
         try:
-            frame_height, frame_width = frame.shape[:2]
+            frame_width = ctx.width
             frame_center_x = frame_width // 2
             
-            for face in faces:
+            for face in ctx.faces:
                 if isinstance(face, dict):  # OpenCV face format
                     x, y, w, h = face['x'], face['y'], face['w'], face['h']
                     face_center_x = x + w // 2
@@ -34,5 +38,5 @@ class HeadPoseDetector:
             return "normal"
             
         except Exception as e:
-            print(f"Error in head pose detection: {e}")
+            logger.error("Error in head pose detection: %s", e)
             return "normal"
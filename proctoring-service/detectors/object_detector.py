@@ -1,55 +1,127 @@
 # detectors/object_detector.py - OpenCV DNN Version
+import logging
 import cv2
 import numpy as np
 from config import Config
+from model_registry import get_model_registry
+
+logger = logging.getLogger(__name__)
 
 class ObjectDetector:
-    def __init__(self):
-        try:
-            print("Loading YOLO object detector...")
-            self.net = cv2.dnn.readNet(Config.YOLO_WEIGHTS_PATH, Config.YOLO_CONFIG_PATH)
-            
-            with open(Config.COCO_NAMES_PATH, 'r') as f:
-                self.class_labels = [line.strip() for line in f.readlines()]
-            
-            layer_names = self.net.getLayerNames()
-            self.output_layers = [layer_names[i - 1] for i in self.net.getUnconnectedOutLayers()]
-            print("Object detector loaded successfully")
-            
-        except Exception as e:
-            print(f"Warning: Could not load YOLO detector: {e}")
-            self.net = None
+    def __init__(self, models=None):
+        # Network is shared across sessions; forward passes go through net_lock
+        models = models or get_model_registry()
+        self.net = models.yolo_net
+        self.net_lock = models.yolo_lock
+        self.class_labels = models.class_labels
+        self.output_layers = models.yolo_output_layers
+        self.batcher = models.yolo_batcher
+        
+        # Boolean lookup by class id, so filtering is a single array index
+        self.suspicious_mask = np.array(
+            [label in Config.SUSPICIOUS_OBJECTS for label in self.class_labels], dtype=bool
+        )
     
-    def detect(self, frame):
-        """Detect suspicious objects"""
-        if self.net is None:
-            return []
+    def _forward(self, image, input_size=416, buffers=None):
+        """YOLO forward pass, batched with other sessions when enabled"""
+        size = (input_size, input_size)
+        if self.batcher is not None and self.batcher.input_size == size:
+            return self.batcher.infer(image)
         
-        try:
-            height, width = frame.shape[:2]
-            
-            # Prepare image for YOLO
+        if buffers is not None and image.ndim == 3:
+            blob = self._blob_into(image, input_size, buffers)
+        else:
+            # Prepare image for YOLO - the working copy is already closer
+            # to the network input than the full frame, so resizing it is cheaper
             blob = cv2.dnn.blobFromImage(
-                frame, 0.00392, (416, 416), (0, 0, 0), True, crop=False
+                image, 0.00392, size, (0, 0, 0), True, crop=False
             )
+        with self.net_lock:
             self.net.setInput(blob)
-            outs = self.net.forward(self.output_layers)
-            
-            detected_objects = []
-            
-            for out in outs:
-                for detection in out:
-                    scores = detection[5:]
-                    class_id = np.argmax(scores)
-                    confidence = scores[class_id]
-                    
-                    if confidence > Config.YOLO_CONFIDENCE_THRESHOLD:
-                        label = self.class_labels[class_id]
-                        if label in Config.SUSPICIOUS_OBJECTS:
-                            detected_objects.append(label)
+            return self.net.forward(self.output_layers)
+    
+    def _blob_into(self, image, input_size, buffers):
+        """
+        Same as blobFromImage(image, 1/255, size, swapRB=True) but written
+        into the session's reusable resize and NCHW float32 arrays
+        """
+        resized = cv2.resize(image, (input_size, input_size),
+                             dst=buffers.get('yolo_input', (input_size, input_size, 3)))
+        blob = buffers.get('yolo_blob', (1, 3, input_size, input_size), np.float32)
+        # HWC BGR -> CHW RGB is only a view; the multiply writes straight into the blob
+        np.multiply(resized.transpose(2, 0, 1)[::-1], np.float32(0.00392),
+                    out=blob[0], dtype=np.float32, casting='unsafe')
+        return blob
+    
+    def _decode(self, outs, width, height):
+        """
+        Decode YOLO output tensors with whole-array operations.
+        Returns (boxes, confidences, class_ids) after confidence
+        filtering, suspicious-class filtering and per-class NMS; boxes
+        are [x, y, w, h] in pixels of a width x height frame.
+        """
+        dets = np.concatenate([out.reshape(-1, out.shape[-1]) for out in outs], axis=0)
+        
+        scores = dets[:, 5:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(dets)), class_ids]
+        
+        keep = (confidences > Config.YOLO_CONFIDENCE_THRESHOLD) & self.suspicious_mask[class_ids]
+        if not keep.any():
+            return np.empty((0, 4), np.int32), np.empty(0, np.float32), np.empty(0, np.int64)
+        
+        dets, confidences, class_ids = dets[keep], confidences[keep], class_ids[keep]
+        
+        # Center/size (relative) -> top-left/size (pixels)
+        centers = dets[:, 0:2] * (width, height)
+        sizes = dets[:, 2:4] * (width, height)
+        boxes = np.hstack([centers - sizes / 2, sizes]).astype(np.int32)
+        
+        if hasattr(cv2.dnn, 'NMSBoxesBatched'):
+            indices = cv2.dnn.NMSBoxesBatched(
+                boxes.tolist(), confidences.tolist(), class_ids.tolist(),
+                Config.YOLO_CONFIDENCE_THRESHOLD, Config.YOLO_NMS_THRESHOLD
+            )
+        else:
+            indices = cv2.dnn.NMSBoxes(
+                boxes.tolist(), confidences.tolist(),
+                Config.YOLO_CONFIDENCE_THRESHOLD, Config.YOLO_NMS_THRESHOLD
+            )
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        
+        return boxes[indices], confidences[indices], class_ids[indices]
+    
+    def detect_detailed(self, ctx):
+        """
+        Detect suspicious objects with their locations
+        Returns: list of {'label', 'confidence', 'box': [x, y, w, h]}
+        in original frame coordinates
+        """
+        if self.net is None:
+            return []
+        
+        try:
+            outs = self._forward(ctx.working, ctx.profile['yolo_input_size'], ctx.buffers)
+            boxes, confidences, class_ids = self._decode(outs, ctx.width, ctx.height)
             
-            return list(set(detected_objects))  # Remove duplicates
+            return [
+                {
+                    'label': self.class_labels[class_id],
+                    'confidence': round(float(confidence), 4),
+                    'box': [int(v) for v in box]
+                }
+                for box, confidence, class_id in zip(boxes, confidences, class_ids)
+            ]
             
         except Exception as e:
-            print(f"Error in object detection: {e}")
+            logger.error("Error in object detection: %s", e)
             return []
+    
+    def detect(self, ctx):
+        """Detect suspicious objects - label names only"""
+        return labels_of(self.detect_detailed(ctx))
+
+
+def labels_of(detections):
+    """Unique labels of a detect_detailed() result"""
+    return sorted({d['label'] for d in detections})
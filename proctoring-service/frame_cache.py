@@ -0,0 +1,82 @@
+# frame_cache.py - Reuses the last analysis for near-identical frames
+import time
+import cv2
+import numpy as np
+from config import Config
+
+
+class FrameReuseCache:
+    """
+    Per-session fingerprint of the last fully analyzed frame.
+
+    The fingerprint is a 32x24 grayscale thumbnail (area-averaged, so
+    sensor and JPEG noise mostly cancel out). A frame counts as a
+    duplicate when both the mean and the largest per-cell difference to
+    the stored thumbnail are under the thresholds - the second check
+    keeps a small object entering one corner from being averaged away.
+
+    Reuse is capped at FRAME_REUSE_MAX_FRAMES consecutive frames and
+    FRAME_REUSE_MAX_SECONDS, after which the next frame is analyzed in
+    full no matter how similar it is.
+    """
+    SIZE = (32, 24)
+
+    def __init__(self, mean_threshold=None, pixel_threshold=None, max_frames=None, max_seconds=None):
+        self.mean_threshold = Config.FRAME_REUSE_MEAN_THRESHOLD if mean_threshold is None else mean_threshold
+        self.pixel_threshold = Config.FRAME_REUSE_PIXEL_THRESHOLD if pixel_threshold is None else pixel_threshold
+        self.max_frames = Config.FRAME_REUSE_MAX_FRAMES if max_frames is None else max_frames
+        self.max_seconds = Config.FRAME_REUSE_MAX_SECONDS if max_seconds is None else max_seconds
+        self.stats = {'frames': 0, 'hits': 0, 'changed': 0, 'expired': 0}
+        self.clear()
+
+    def clear(self):
+        """Forget the stored frame (next lookup is a miss)"""
+        self.thumb = None
+        self.analysis = None
+        self.stored_at = None
+        self.reuse_count = 0
+
+    def fingerprint(self, frame):
+        thumb = cv2.resize(frame, self.SIZE, interpolation=cv2.INTER_AREA)
+        if thumb.ndim == 3:
+            thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        return thumb.astype(np.int16)
+
+    def lookup(self, thumb):
+        """
+        Return ('hit', analysis) if the stored analysis can stand in for
+        this frame, else (reason, None) with reason 'empty', 'changed' or
+        'expired'.
+        """
+        self.stats['frames'] += 1
+        if self.thumb is None:
+            return 'empty', None
+
+        diff = np.abs(thumb - self.thumb)
+        if diff.mean() > self.mean_threshold or diff.max() > self.pixel_threshold:
+            self.stats['changed'] += 1
+            return 'changed', None
+
+        if (self.reuse_count >= self.max_frames
+                or time.monotonic() - self.stored_at > self.max_seconds):
+            self.stats['expired'] += 1
+            return 'expired', None
+
+        self.reuse_count += 1
+        self.stats['hits'] += 1
+        return 'hit', self.analysis
+
+    def store(self, thumb, analysis):
+        """Remember a fully analyzed frame and its result"""
+        self.thumb = thumb
+        # Copy: callers are free to annotate the dict they got back
+        self.analysis = dict(analysis)
+        self.stored_at = time.monotonic()
+        self.reuse_count = 0
+
+    def get_stats(self):
+        frames = self.stats['frames']
+        return {
+            **self.stats,
+            'hit_rate': round(self.stats['hits'] / frames, 4) if frames else 0.0
+        }
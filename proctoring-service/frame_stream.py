@@ -0,0 +1,93 @@
+# frame_stream.py - Latest-frame-wins streaming analysis for one session
+import json
+import threading
+import time
+
+
+class FrameStream:
+    """
+    Analyzes a continuous stream of encoded frames for one session.
+    `analyze(buffer)` returns the analysis dict, or None if the frame
+    could not be decoded.
+
+    Incoming frames go into a single pending slot. If a new frame arrives
+    while the previous one is still waiting, the older one is dropped, so
+    at most one frame is being analyzed and one is waiting at any time.
+    Results are pushed back through `send` as soon as they are ready.
+    """
+    def __init__(self, session_id, analyze, send):
+        self.session_id = session_id
+        self.analyze = analyze
+        self.send = send
+
+        self._cond = threading.Condition()
+        self._pending = None
+        self._pending_seq = 0
+        self._closed = False
+
+        self.received = 0
+        self.analyzed = 0
+        self.dropped = 0
+
+        self._worker = threading.Thread(
+            target=self._run, name=f'frame-stream-{session_id}', daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, buffer):
+        """Queue an encoded frame, replacing any frame not yet picked up"""
+        with self._cond:
+            self.received += 1
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = buffer
+            self._pending_seq = self.received
+            self._cond.notify()
+
+    def close(self):
+        """Stop the worker once the current frame (if any) is finished"""
+        with self._cond:
+            self._closed = True
+            self._pending = None
+            self._cond.notify()
+        self._worker.join(timeout=5)
+
+    def _take(self):
+        with self._cond:
+            while self._pending is None and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None, 0
+            buffer, seq = self._pending, self._pending_seq
+            self._pending = None
+            return buffer, seq
+
+    def _run(self):
+        while True:
+            buffer, seq = self._take()
+            if buffer is None:
+                return
+
+            started = time.perf_counter()
+            message = {'session_id': self.session_id, 'seq': seq}
+            try:
+                analysis = self.analyze(buffer)
+                if analysis is None:
+                    message.update({'success': False, 'error': 'Failed to decode image'})
+                else:
+                    capture = analysis.pop('capture', None)
+                    windows = analysis.pop('windows', [])
+                    message.update({'success': True, 'capture': capture, 'windows': windows,
+                                    'analysis': analysis})
+                    self.analyzed += 1
+            except Exception as e:
+                message.update({'success': False, 'error': f'Analysis error: {str(e)}'})
+
+            message['processing_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            message['dropped_frames'] = self.dropped
+
+            try:
+                self.send(json.dumps(message))
+            except Exception:
+                # Client went away; the receive loop will notice and close us
+                return
@@ -0,0 +1,144 @@
+# metrics.py - Hot-path latency histograms and counters (Prometheus text format)
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+HELP = {
+    'proctoring_stage_duration_seconds': 'Time spent in each pipeline stage per frame',
+    'proctoring_frames_total': 'Frames analyzed, by outcome',
+    'proctoring_session_frames_total': 'Frames analyzed per session',
+    'proctoring_face_detection_total': 'Face detection passes, by mode',
+    'proctoring_object_detection_total': 'YOLO scheduling decisions, by reason',
+    'proctoring_frame_reuse_total': 'Near-duplicate frame cache lookups, by result',
+    'proctoring_profile_frames_total': 'Frames analyzed, by performance profile',
+    'proctoring_load_shed_transitions_total': 'Load shedding profile switches, by direction',
+    'proctoring_load_shed_level': 'Profiles below the configured one currently in use (max over workers)',
+    'proctoring_active_sessions': 'Sessions currently held in memory',
+    'proctoring_worker_restarts_total': 'Worker processes that died and were replaced',
+    'proctoring_evicted_sessions': 'Sessions evicted by TTL, count or memory limits since start',
+    'proctoring_models_ready': '1 once detector models are loaded and warmed up'
+}
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+class Metrics:
+    """
+    Process-local metric store. Every update is a dict lookup plus a few
+    additions under one lock, so it is cheap enough to call per stage.
+    snapshot() returns plain data that can be pickled from worker
+    processes and merged with merge_snapshots().
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+            if index < len(LATENCY_BUCKETS):
+                hist[0][index] += 1
+            hist[1] += seconds
+            hist[2] += 1
+
+    def inc(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, stage):
+        """Record the duration of the enclosed block as a pipeline stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('proctoring_stage_duration_seconds', time.perf_counter() - started, stage=stage)
+
+    def forget_session(self, session_id):
+        """Drop per-session series once a session is deleted or evicted"""
+        labels = (('session_id', session_id),)
+        with self._lock:
+            self._counters.pop(('proctoring_session_frames_total', labels), None)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'histograms': {k: [list(v[0]), v[1], v[2]] for k, v in self._histograms.items()},
+                'counters': dict(self._counters)
+            }
+
+
+def merge_snapshots(snapshots):
+    merged = {'histograms': {}, 'counters': {}}
+    for snap in snapshots:
+        for key, (buckets, total, count) in snap['histograms'].items():
+            hist = merged['histograms'].setdefault(key, [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+            hist[0] = [a + b for a, b in zip(hist[0], buckets)]
+            hist[1] += total
+            hist[2] += count
+        for key, value in snap['counters'].items():
+            merged['counters'][key] = merged['counters'].get(key, 0) + value
+    return merged
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = [
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+
+def render_prometheus(snapshot, gauges=None):
+    """Render a snapshot (plus optional {name: value} gauges) as Prometheus text"""
+    lines = []
+
+    def header(name, kind):
+        lines.append(f'# HELP {name} {HELP.get(name, name)}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    by_name = {}
+    for (name, labels), value in snapshot['histograms'].items():
+        by_name.setdefault(name, []).append((labels, value))
+    for name in sorted(by_name):
+        header(name, 'histogram')
+        for labels, (buckets, total, count) in sorted(by_name[name]):
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, buckets):
+                cumulative += n
+                lines.append(f'{name}_bucket{_labels(labels + (("le", repr(bound)),))} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{name}_sum{_labels(labels)} {total}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+
+    by_name = {}
+    for (name, labels), value in snapshot['counters'].items():
+        by_name.setdefault(name, []).append((labels, value))
+    for name in sorted(by_name):
+        header(name, 'counter')
+        for labels, value in sorted(by_name[name]):
+            lines.append(f'{name}{_labels(labels)} {value}')
+
+    for name, value in sorted((gauges or {}).items()):
+        header(name, 'gauge')
+        lines.append(f'{name} {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+# Process-wide instance used by the pipeline
+metrics = Metrics()
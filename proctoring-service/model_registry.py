@@ -0,0 +1,187 @@
+# model_registry.py - Shared, read-only detector models
+import logging
+import threading
+import time
+import cv2
+import numpy as np
+from config import Config
+from yolo_batcher import YoloBatcher
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Holds every detector model once per process.
+    Sessions only hold references to these objects, so creating a new
+    ProctoringEngine does not touch the disk or the DNN runtime.
+
+    Models are loaded lazily on first access (or all at once by
+    warm_up()), so constructing the registry - and importing the API -
+    costs nothing.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._face_cascade = None
+        self._eye_cascade = None
+        self._yolo_loaded = False
+        self._yolo_net = None
+        self._yolo_output_layers = []
+        self._class_labels = []
+        self._yolo_batcher = None
+
+        # A single cv2.dnn.Net cannot run two forward passes at once, so
+        # callers must hold yolo_lock around setInput/forward
+        self.yolo_lock = threading.Lock()
+
+        # Readiness / cold-start reporting
+        self.load_ms = {}
+        self.warm_up_ms = None
+        self.warmed = False
+
+    def _timed(self, name, load):
+        started = time.perf_counter()
+        result = load()
+        self.load_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    # Haar cascades (face + eyes)
+
+    @property
+    def face_cascade(self):
+        if self._face_cascade is None:
+            with self._lock:
+                if self._face_cascade is None:
+                    cascade = self._timed('face_cascade', lambda: cv2.CascadeClassifier(
+                        cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+                    ))
+                    if cascade.empty():
+                        raise Exception("Failed to load OpenCV face cascade")
+                    self._face_cascade = cascade
+        return self._face_cascade
+
+    @property
+    def eye_cascade(self):
+        if self._eye_cascade is None and 'eye_cascade' not in self.load_ms:
+            with self._lock:
+                if self._eye_cascade is None and 'eye_cascade' not in self.load_ms:
+                    cascade = self._timed('eye_cascade', lambda: cv2.CascadeClassifier(
+                        cv2.data.haarcascades + 'haarcascade_eye.xml'
+                    ))
+                    if cascade.empty():
+                        logger.warning("Could not load eye cascade")
+                        cascade = None
+                    self._eye_cascade = cascade
+        return self._eye_cascade
+
+    # YOLO network
+
+    def _load_yolo(self):
+        if self._yolo_loaded:
+            return
+        with self._lock:
+            if self._yolo_loaded:
+                return
+            started = time.perf_counter()
+            try:
+                net = cv2.dnn.readNet(Config.YOLO_WEIGHTS_PATH, Config.YOLO_CONFIG_PATH)
+
+                with open(Config.COCO_NAMES_PATH, 'r') as f:
+                    self._class_labels = [line.strip() for line in f.readlines()]
+
+                layer_names = net.getLayerNames()
+                self._yolo_output_layers = [
+                    layer_names[i - 1] for i in net.getUnconnectedOutLayers()
+                ]
+                self._yolo_net = net
+            except Exception as e:
+                logger.warning("Could not load YOLO detector: %s", e)
+                self._yolo_net = None
+
+            # Optional batching stage shared by every session's ObjectDetector
+            if self._yolo_net is not None and Config.YOLO_BATCHING_ENABLED:
+                self._yolo_batcher = YoloBatcher(
+                    self._yolo_net,
+                    self._yolo_output_layers,
+                    self.yolo_lock,
+                    max_batch_size=Config.YOLO_BATCH_SIZE,
+                    max_wait_ms=Config.YOLO_BATCH_MAX_WAIT_MS
+                )
+
+            self.load_ms['yolo'] = round((time.perf_counter() - started) * 1000, 2)
+            self._yolo_loaded = True
+
+    @property
+    def yolo_net(self):
+        self._load_yolo()
+        return self._yolo_net
+
+    @property
+    def yolo_output_layers(self):
+        self._load_yolo()
+        return self._yolo_output_layers
+
+    @property
+    def class_labels(self):
+        self._load_yolo()
+        return self._class_labels
+
+    @property
+    def yolo_batcher(self):
+        self._load_yolo()
+        return self._yolo_batcher
+
+    @property
+    def loaded(self):
+        return self._face_cascade is not None and 'eye_cascade' in self.load_ms and self._yolo_loaded
+
+    def warm_up(self):
+        """
+        Load every model and run one dummy inference through each, so the
+        first real frame doesn't pay for lazy allocations inside OpenCV.
+        """
+        if self.warmed:
+            return
+        with self._lock:
+            if self.warmed:
+                return
+            started = time.perf_counter()
+
+            gray = np.zeros((240, 320), np.uint8)
+            self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+            if self.eye_cascade is not None:
+                self.eye_cascade.detectMultiScale(gray[:100, :100], scaleFactor=1.1, minNeighbors=5)
+
+            if self.yolo_net is not None:
+                blob = cv2.dnn.blobFromImage(
+                    np.zeros((240, 320, 3), np.uint8), 0.00392, (416, 416), (0, 0, 0), True, crop=False
+                )
+                with self.yolo_lock:
+                    self.yolo_net.setInput(blob)
+                    self.yolo_net.forward(self.yolo_output_layers)
+
+            self.warm_up_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.warmed = True
+
+    def readiness(self):
+        return {
+            'models_loaded': self.loaded,
+            'warmed_up': self.warmed,
+            'yolo_available': self._yolo_net is not None if self._yolo_loaded else None,
+            'load_ms': dict(self.load_ms),
+            'warm_up_ms': self.warm_up_ms
+        }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Return the process-wide ModelRegistry (models load on first use)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
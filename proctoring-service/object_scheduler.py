@@ -0,0 +1,129 @@
+# object_scheduler.py - Decides which frames get a YOLO pass
+import time
+import cv2
+from config import Config
+
+
+class ObjectDetectionScheduler:
+    """
+    Per-session cadence for object detection.
+
+    Policies (Config.OBJECT_DETECTION_POLICY):
+      - 'every_frame': run YOLO on every frame (original behaviour)
+      - 'fixed':       run every OBJECT_DETECTION_INTERVAL frames
+      - 'adaptive':    like 'fixed', but run immediately when the frame
+                       changes a lot (motion), when the face count
+                       changes, or for OBJECT_DETECTION_CONFIRM_RUNS
+                       runs after a label first appears (confirming it)
+
+Labels that persist (a 'person' in every frame) don't keep YOLO on
+every frame: once confirmed they are re-checked on the regular cadence.
+
+    Between runs the last result is carried over together with its age.
+    The worst-case detection delay is therefore OBJECT_DETECTION_INTERVAL
+    - 1 frames for 'fixed' and 'adaptive'; get_stats() reports the delay
+    actually observed.
+    """
+    MOTION_SIZE = (32, 24)
+
+    def __init__(self, policy=None, interval=None):
+        self.policy = policy or Config.OBJECT_DETECTION_POLICY
+        self.interval = max(1, interval or Config.OBJECT_DETECTION_INTERVAL)
+        self.reset()
+
+    def reset(self):
+        self.last_detections = []
+        self.confirm_runs_left = 0
+        self.last_run_time = None
+        self.frames_since_run = None
+        self.last_thumb = None
+        self.last_face_count = None
+        self.stats = {
+            'frames': 0,
+            'runs': 0,
+            'motion_triggers': 0,
+            'face_triggers': 0,
+            'confirm_runs': 0,
+            'max_gap_frames': 0,
+            'max_gap_seconds': 0.0
+        }
+
+    def _thumbnail(self, ctx):
+        return cv2.resize(ctx.gray, self.MOTION_SIZE, interpolation=cv2.INTER_AREA)
+
+    def should_run(self, ctx, face_count):
+        """
+        Return (run, reason) for this frame. face_count is the current
+        frame's face count, or the previous frame's when YOLO has to be
+        scheduled before face detection finishes.
+        """
+        self.stats['frames'] += 1
+
+        if self.policy == 'every_frame' or self.frames_since_run is None:
+            return True, 'scheduled'
+
+        if self.frames_since_run + 1 >= self.interval:
+            return True, 'scheduled'
+
+        if self.policy == 'adaptive':
+            if self.confirm_runs_left:
+                self.stats['confirm_runs'] += 1
+                return True, 'confirming'
+
+            # Compare against the frame YOLO last saw, so slow drift
+            # accumulates instead of hiding under a per-frame threshold
+            if face_count != self.last_face_count:
+                self.stats['face_triggers'] += 1
+                return True, 'face_change'
+
+            motion = float(cv2.absdiff(self._thumbnail(ctx), self.last_thumb).mean())
+            if motion > Config.OBJECT_DETECTION_MOTION_THRESHOLD:
+                self.stats['motion_triggers'] += 1
+                return True, 'motion'
+
+        return False, 'skipped'
+
+    def record_run(self, ctx, detections, face_count):
+        now = time.monotonic()
+        if self.frames_since_run is not None:
+            gap = self.frames_since_run + 1
+            self.stats['max_gap_frames'] = max(self.stats['max_gap_frames'], gap)
+            self.stats['max_gap_seconds'] = max(
+                self.stats['max_gap_seconds'], round(now - self.last_run_time, 3)
+            )
+        self.stats['runs'] += 1
+        if set(detections) - set(self.last_detections):
+            # Something new: look again on the next frames to confirm it
+            self.confirm_runs_left = Config.OBJECT_DETECTION_CONFIRM_RUNS
+        elif self.confirm_runs_left:
+            self.confirm_runs_left -= 1
+        self.last_detections = detections
+        self.last_run_time = now
+        self.frames_since_run = 0
+        if self.policy == 'adaptive':
+            # Baselines for the motion / face-change triggers
+            self.last_thumb = self._thumbnail(ctx)
+            self.last_face_count = face_count
+
+    def record_skip(self):
+        self.frames_since_run += 1
+
+    def carried_over(self):
+        """Last result plus how old it is"""
+        return {
+            'ran': self.frames_since_run == 0,
+            'age_frames': self.frames_since_run or 0,
+            'age_seconds': round(time.monotonic() - self.last_run_time, 3) if self.last_run_time else 0.0
+        }
+
+    def get_stats(self):
+        frames = self.stats['frames']
+        return {
+            'policy': self.policy,
+            'interval': self.interval,
+            **self.stats,
+            'run_ratio': round(self.stats['runs'] / frames, 4) if frames else 0.0,
+            # With YOLO as the dominant cost this is ~ the throughput gain
+            'speedup_estimate': round(frames / self.stats['runs'], 2) if self.stats['runs'] else 0.0,
+            'delay_bound_frames': 0 if self.policy == 'every_frame' else self.interval - 1
+        }
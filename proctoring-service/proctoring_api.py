@@ -1,20 +1,52 @@
-from flask import Flask, request, jsonify
+import time
+
+# Cold-start reference point: everything after this counts towards startup
+_import_started = time.perf_counter()
+
+import logging
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+from flask_sock import Sock
+import argparse
+import atexit
 import base64
-import cv2
-import numpy as np
+import json
+import signal
+import sys
+import threading
 import traceback
-from proctoring_engine import ProctoringEngine
+from config import Config
+from activity_store import ENTRY_FIELDS
+from metrics import metrics, merge_snapshots, render_prometheus
+from model_registry import get_model_registry
+from profiles import load_shedder
+from frame_stream import FrameStream
+from sessions import SessionNotFound, create_session_registry, run_session_op
+from worker_pool import WorkerPool
 from datetime import datetime
 
+logging.basicConfig(
+    level=Config.LOG_LEVEL,
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+logger = logging.getLogger('proctoring_api')
+
 app = Flask(__name__)
 CORS(app)
+sock = Sock(app)
+
+# Session-specific engines (for multi-user support), with idle/LRU eviction
+session_registry = create_session_registry()
 
-# Initialize proctoring engine
-proctoring_engine = ProctoringEngine()
+# Set when serving with --workers N; sessions then live in worker processes
+worker_pool = None
 
-# Store session-specific engines (for multi-user support)
-session_engines = {}
+# Milliseconds from import to models loaded + warmed, once known
+cold_start_ms = None
+
+# Background warm-up, started once per process (start_warm_up)
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
 
 
 @app.route('/health', methods=['GET'])
@@ -27,6 +59,104 @@ def health_check():
     })
 
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint - 200 once detector models are loaded and warmed up"""
+    readiness = get_model_registry().readiness()
+    ready = readiness['models_loaded'] and readiness['warmed_up']
+    
+    return jsonify({
+        'ready': ready,
+        'cold_start_ms': cold_start_ms,
+        **readiness
+    }), 200 if ready else 503
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Per-stage latency histograms and counters in Prometheus text format"""
+    if worker_pool is not None:
+        snapshot = merge_snapshots([metrics.snapshot()] + worker_pool.broadcast('metrics'))
+        registry_stats = worker_pool.broadcast('registry_stats')
+        load_stats = worker_pool.broadcast('load_shedding')
+    else:
+        snapshot = metrics.snapshot()
+        registry_stats = [session_registry.stats()]
+        load_stats = [load_shedder.stats()]
+    
+    gauges = {
+        'proctoring_active_sessions': sum(r['active_sessions'] for r in registry_stats),
+        'proctoring_evicted_sessions': sum(
+            r['evicted_ttl'] + r['evicted_capacity'] + r['evicted_memory'] for r in registry_stats
+        ),
+        'proctoring_models_ready': int(get_model_registry().warmed),
+        'proctoring_load_shed_level': max(l['level'] for l in load_stats)
+    }
+    
+    return Response(render_prometheus(snapshot, gauges), mimetype='text/plain; version=0.0.4')
+
+
+def warm_up_models():
+    """Load + warm every model and record the cold-start time"""
+    global cold_start_ms
+    try:
+        get_model_registry().warm_up()
+        cold_start_ms = round((time.perf_counter() - _import_started) * 1000, 2)
+        logger.info("Models ready - cold start took %s ms", cold_start_ms)
+    except Exception as e:
+        logger.exception("Model warm-up failed: %s", e)
+
+
+def start_warm_up(wait=False):
+    """Start warm_up_models in a background thread unless already started; wait=True blocks until done"""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up_models, name='model-warm-up', daemon=True)
+            _warm_up_thread.start()
+    if wait:
+        _warm_up_thread.join()
+
+
+@app.before_request
+def _ensure_warm_up():
+    # Under a WSGI server (or the test client) __main__ never runs: the
+    # first request, typically the /ready probe, starts the warm-up
+    start_warm_up()
+
+
+def _session_call(session_id, op, *args):
+    """Run a per-session operation in-process or on the session's worker"""
+    if worker_pool is not None:
+        return worker_pool.call(session_id, op, *args)
+    return run_session_op(session_registry, session_id, op, *args)
+
+
+def _session_not_found():
+    return jsonify({
+        'success': False,
+        'error': 'Session not found'
+    }), 404
+
+
+def _analyze_for_session(session_id, buffer):
+    """Run the proctoring pipeline for an encoded frame and build the response"""
+    analysis = _session_call(session_id, 'analyze', buffer)
+    
+    if analysis is None:
+        return jsonify({'success': False, 'error': 'Failed to decode image'}), 400
+    
+    return jsonify({
+        'success': True,
+        'session_id': session_id,
+        # Recommended interval / resolution / JPEG quality for the next frame
+        'capture': analysis.pop('capture', None),
+        # Aggregate windows this frame closed (see GET /session/<id>/aggregates)
+        'windows': analysis.pop('windows', []),
+        'analysis': analysis
+    })
+
+
 @app.route('/analyze-frame', methods=['POST'])
 def analyze_frame():
     """
@@ -50,98 +180,371 @@ def analyze_frame():
                 frame_b64 = frame_b64.split('base64,')[1]
             
             img_bytes = base64.b64decode(frame_b64)
-            np_arr = np.frombuffer(img_bytes, np.uint8)
-            frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-            
-            if frame is None:
-                return jsonify({'success': False, 'error': 'Failed to decode image'}), 400
-            
-            print(f"Image decoded: shape={frame.shape}, dtype={frame.dtype}")
-            
-            # Get or create engine
-            if session_id not in session_engines:
-                session_engines[session_id] = ProctoringEngine()
             
-            engine = session_engines[session_id]
-            
-            # Run complete proctoring analysis
-            analysis = engine.analyze_frame(frame)
+            return _analyze_for_session(session_id, img_bytes)
             
+        except Exception as analyze_error:
+            logger.error("Analysis error: %s", analyze_error)
             return jsonify({
-                'success': True,
-                'session_id': session_id,
-                'analysis': analysis
-            })
+                'success': False, 
+                'error': f'Analysis error: {str(analyze_error)}'
+            }), 400
+        
+    except Exception as e:
+        logger.error("Server error: %s", traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': f'Server error: {str(e)}'
+        }), 500
+
+
+@app.route('/analyze-frame/binary', methods=['POST'])
+def analyze_frame_binary():
+    """
+    Analyze a frame sent as raw JPEG/PNG bytes instead of base64 JSON.
+
+    Accepts either:
+      - a raw body (Content-Type: image/jpeg, image/png or
+        application/octet-stream), with the session id in the
+        `session_id` query parameter or the `X-Session-Id` header
+      - multipart/form-data with the image in a `frame` file field and
+        an optional `session_id` form field
+    """
+    try:
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('frame')
+            if upload is None:
+                return jsonify({'success': False, 'error': 'No frame file provided'}), 400
+            buffer = upload.stream.read()
+            session_id = request.form.get('session_id') or request.args.get('session_id', 'default')
+        else:
+            # Read the body once, straight from the WSGI stream, without
+            # letting Flask cache or form-parse it
+            buffer = request.get_data(cache=False, parse_form_data=False)
+            session_id = (
+                request.args.get('session_id')
+                or request.headers.get('X-Session-Id')
+                or 'default'
+            )
+        
+        if not buffer:
+            return jsonify({'success': False, 'error': 'No frame data provided'}), 400
+        
+        try:
+            return _analyze_for_session(session_id, buffer)
             
         except Exception as analyze_error:
-            print(f"Analysis error: {str(analyze_error)}")
+            logger.error("Analysis error: %s", analyze_error)
             return jsonify({
                 'success': False, 
                 'error': f'Analysis error: {str(analyze_error)}'
             }), 400
         
     except Exception as e:
-        print(f"Server error: {traceback.format_exc()}")
+        logger.error("Server error: %s", traceback.format_exc())
         return jsonify({
             'success': False,
             'error': f'Server error: {str(e)}'
         }), 500
 
 
+@sock.route('/stream/<session_id>')
+def stream_frames(ws, session_id):
+    """
+    Long-lived WebSocket channel for continuous frame analysis.
+
+    The client sends binary JPEG/PNG messages; each analysis result is
+    pushed back as a JSON text message with the frame's sequence number.
+    Frames that arrive while the analyzer is busy replace the waiting
+    frame instead of queueing, so results never lag behind the camera.
+    """
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            ws.send(message)
+
+    def analyze(buffer):
+        return _session_call(session_id, 'analyze', buffer)
+
+    stream = FrameStream(session_id, analyze, send)
+    try:
+        while True:
+            data = ws.receive()
+            if isinstance(data, str):
+                # Text messages are only used as keep-alives
+                if data == 'ping':
+                    send('pong')
+                continue
+            stream.submit(data)
+    finally:
+        stream.close()
+
+
+def _audio_sample_rate():
+    """Sample rate from the `sample_rate` query parameter (None = session default)"""
+    value = request.args.get('sample_rate')
+    if value is None:
+        return None
+    rate = int(value)
+    if not 8000 <= rate <= 48000:
+        raise ValueError("sample_rate must be between 8000 and 48000")
+    return rate
+
+
+@app.route('/session/<session_id>/audio', methods=['POST'])
+def analyze_audio(session_id):
+    """
+    Analyze a chunk of the candidate's audio: raw 16-bit little-endian
+    mono PCM in the body, sample rate in the `sample_rate` query parameter
+    (default Config.AUDIO_SAMPLE_RATE). Returns features for every
+    window the chunk completed; flags are also merged into the next
+    frame analysis of the session.
+    """
+    try:
+        sample_rate = _audio_sample_rate()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    pcm = request.get_data(cache=False, parse_form_data=False)
+    if not pcm:
+        return jsonify({'success': False, 'error': 'No audio data provided'}), 400
+    
+    try:
+        result = _session_call(session_id, 'audio', pcm, sample_rate)
+    except Exception as e:
+        logger.exception("Error in analyze_audio endpoint: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({
+        'success': True,
+        'session_id': session_id,
+        **result
+    })
+
+
+@sock.route('/stream/<session_id>/audio')
+def stream_audio(ws, session_id):
+    """
+    WebSocket channel for continuous audio. The client sends binary PCM
+    chunks (as for POST /session/<id>/audio, `sample_rate` in the query
+    string); the features of completed windows are pushed back as JSON.
+    Chunks are cheap to analyze, so they are handled inline.
+    """
+    try:
+        sample_rate = _audio_sample_rate()
+    except ValueError as e:
+        ws.send(json.dumps({'success': False, 'error': str(e)}))
+        return
+    
+    while True:
+        data = ws.receive()
+        if isinstance(data, str):
+            if data == 'ping':
+                ws.send('pong')
+            continue
+        result = _session_call(session_id, 'audio', data, sample_rate)
+        if result['windows']:
+            ws.send(json.dumps({'session_id': session_id, 'windows': result['windows']}))
+
+
+def _parse_time(value):
+    """Epoch seconds or an ISO 8601 timestamp -> epoch seconds"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _activity_log_query(args):
+    """Build an ActivityStore.page query from request args (raises ValueError)"""
+    query = {}
+    if 'cursor' in args:
+        query['cursor'] = int(args['cursor'])
+    if 'limit' in args:
+        query['limit'] = int(args['limit'])
+        if query['limit'] < 1:
+            raise ValueError("limit must be at least 1")
+    for name in ('since', 'until'):
+        if name in args:
+            query[name] = _parse_time(args[name])
+    if 'fields' in args:
+        fields = [f for f in args['fields'].split(',') if f]
+        unknown = sorted(set(fields) - set(ENTRY_FIELDS))
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        query['fields'] = fields
+    return query
+
+
+def _stream_activity_log(session_id, query, page):
+    """
+    Yield NDJSON lines page by page, so the session lock is only held for
+    one page at a time and the full log is never built in memory
+    """
+    remaining = query.get('limit')
+    while True:
+        for entry in page['entries']:
+            yield json.dumps(entry) + '\n'
+        if remaining is not None:
+            remaining -= len(page['entries'])
+        if page['next_cursor'] is None or remaining == 0:
+            return
+        
+        next_query = {**query, 'cursor': page['next_cursor']}
+        next_query['limit'] = min(Config.ACTIVITY_LOG_PAGE_SIZE, remaining or Config.ACTIVITY_LOG_PAGE_SIZE)
+        try:
+            page = _session_call(session_id, 'activity_page', next_query)
+        except SessionNotFound:
+            # Session ended mid-export; what was sent so far stays valid
+            return
+
+
 @app.route('/session/<session_id>/activity-log', methods=['GET'])
 def get_activity_log(session_id):
-    """Get complete activity log for a session"""
-    if session_id not in session_engines:
-        return jsonify({
-            'success': False,
-            'error': 'Session not found'
-        }), 404
+    """
+    Get the activity log for a session.
+    
+    Optional query parameters: cursor (sequence number to start at), limit,
+    since / until (epoch seconds or ISO timestamps), fields (comma-separated
+    subset of entry keys) and format=ndjson to stream one entry per line.
+    Without limit the whole retained log is returned.
+    """
+    try:
+        query = _activity_log_query(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    streaming = request.args.get('format') == 'ndjson'
+    first_query = query
+    if streaming:
+        first_query = {**query, 'limit': min(query.get('limit', Config.ACTIVITY_LOG_PAGE_SIZE),
+                                             Config.ACTIVITY_LOG_PAGE_SIZE)}
+    
+    try:
+        # Fetch the first page up front so unknown sessions still get a 404
+        page = _session_call(session_id, 'activity_page', first_query)
+    except SessionNotFound:
+        return _session_not_found()
+    
+    if streaming:
+        return Response(_stream_activity_log(session_id, query, page),
+                        mimetype='application/x-ndjson')
+    
+    return jsonify({
+        'success': True,
+        'session_id': session_id,
+        'total_activities': len(page['entries']),
+        'activity_log': page['entries'],
+        'next_cursor': page['next_cursor'],
+        'first_seq': page['first_seq']
+    })
+
+
+def _aggregates_query(args):
+    """Build a WindowAggregator.query query from request args (raises ValueError)"""
+    query = {'seconds': int(args.get('window', Config.AGGREGATE_WINDOWS[0]))}
+    if query['seconds'] not in Config.AGGREGATE_WINDOWS:
+        raise ValueError(f"window must be one of {', '.join(map(str, Config.AGGREGATE_WINDOWS))}")
+    if 'after' in args:
+        query['after'] = _parse_time(args['after'])
+    if 'limit' in args:
+        query['limit'] = int(args['limit'])
+        if query['limit'] < 1:
+            raise ValueError("limit must be at least 1")
+    return query
+
+
+@app.route('/session/<session_id>/aggregates', methods=['GET'])
+def get_aggregates(session_id):
+    """
+    Rolling aggregates of a session over fixed time windows.
+    
+    Query parameters: window (seconds, one of Config.AGGREGATE_WINDOWS,
+    default the smallest), after (epoch seconds or ISO timestamp; only
+    windows starting later are returned - pass back `cursor` to poll)
+    and limit. `current` is the window still in progress.
+    """
+    try:
+        query = _aggregates_query(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
-    engine = session_engines[session_id]
-    activity_log = engine.get_activity_log()
+    try:
+        result = _session_call(session_id, 'aggregates', query)
+    except SessionNotFound:
+        return _session_not_found()
     
     return jsonify({
         'success': True,
         'session_id': session_id,
-        'total_activities': len(activity_log),
-        'activity_log': activity_log
+        'window_seconds': query['seconds'],
+        **result
     })
 
 
+@app.route('/session/<session_id>/aggregates/close', methods=['POST'])
+def close_aggregates(session_id):
+    """
+    End of the interview: close the windows still in progress and return
+    every window not handed out yet (all sizes), so the last partial
+    window can be stored too. Frames after this start new windows.
+    """
+    try:
+        windows = _session_call(session_id, 'close_windows')
+    except SessionNotFound:
+        return _session_not_found()
+    
+    return jsonify({
+        'success': True,
+        'session_id': session_id,
+        'windows': windows
+    })
+
+
+@sock.route('/stream/<session_id>/aggregates')
+def stream_aggregates(ws, session_id):
+    """
+    Push feed of closed aggregate windows (same query parameters as
+    GET /session/<id>/aggregates). Every AGGREGATE_PUSH_INTERVAL_MS the
+    session is checked and any newly closed windows are sent as one JSON
+    message, so a consumer can store one record per window. A session
+    that doesn't exist yet (or any more) is simply waited for.
+    """
+    try:
+        query = _aggregates_query(request.args)
+    except ValueError as e:
+        ws.send(json.dumps({'success': False, 'error': str(e)}))
+        return
+    
+    interval = Config.AGGREGATE_PUSH_INTERVAL_MS / 1000.0
+    while True:
+        try:
+            result = _session_call(session_id, 'aggregates', query)
+        except SessionNotFound:
+            result = None
+        if result and result['windows']:
+            ws.send(json.dumps({
+                'session_id': session_id,
+                'window_seconds': query['seconds'],
+                'windows': result['windows']
+            }))
+            query['after'] = result['cursor']
+        
+        # Doubles as the poll interval; raises once the client disconnects
+        data = ws.receive(timeout=interval)
+        if data == 'ping':
+            ws.send('pong')
+
+
 @app.route('/session/<session_id>/summary', methods=['GET'])
 def get_session_summary(session_id):
     """Get summary statistics for a session"""
-    if session_id not in session_engines:
-        return jsonify({
-            'success': False,
-            'error': 'Session not found'
-        }), 404
-    
-    engine = session_engines[session_id]
-    activity_log = engine.get_activity_log()
-    
-    # Calculate summary statistics
-    summary = {
-        'total_frames_analyzed': len(activity_log),
-        'total_blinks': engine.blink_count,
-        'face_anomalies': 0,
-        'gaze_violations': 0,
-        'head_movement_violations': 0,
-        'object_detections': 0,
-        'total_violations': 0
-    }
-    
-    for activity in activity_log:
-        if 'face_anomaly' in activity.get('suspicious_activity', []):
-            summary['face_anomalies'] += 1
-        if 'looking_away' in activity.get('suspicious_activity', []):
-            summary['gaze_violations'] += 1
-        if 'head_movement' in activity.get('suspicious_activity', []):
-            summary['head_movement_violations'] += 1
-        if 'objects_detected' in activity.get('suspicious_activity', []):
-            summary['object_detections'] += 1
-        
-        summary['total_violations'] += len(activity.get('suspicious_activity', []))
+    try:
+        # Running counters maintained by analyze_frame - constant time
+        summary = _session_call(session_id, 'summary')
+    except SessionNotFound:
+        return _session_not_found()
     
     return jsonify({
         'success': True,
@@ -150,45 +553,96 @@ def get_session_summary(session_id):
     })
 
 
+@app.route('/session/<session_id>/face-tracking', methods=['GET'])
+def get_face_tracking_stats(session_id):
+    """Get face tracking hit rate and per-frame detection timing for a session"""
+    try:
+        face_tracking = _session_call(session_id, 'face_tracking')
+    except SessionNotFound:
+        return _session_not_found()
+    
+    return jsonify({
+        'success': True,
+        'session_id': session_id,
+        'face_tracking': face_tracking
+    })
+
+
+@app.route('/session/<session_id>/object-detection', methods=['GET'])
+def get_object_scheduling_stats(session_id):
+    """Get YOLO cadence, run ratio and observed detection delay for a session"""
+    try:
+        object_detection = _session_call(session_id, 'object_detection')
+    except SessionNotFound:
+        return _session_not_found()
+    
+    return jsonify({
+        'success': True,
+        'session_id': session_id,
+        'object_detection': object_detection
+    })
+
+
+@app.route('/session/<session_id>/frame-reuse', methods=['GET'])
+def get_frame_reuse_stats(session_id):
+    """Get how often near-duplicate frames reused the previous analysis"""
+    try:
+        frame_reuse = _session_call(session_id, 'frame_reuse')
+    except SessionNotFound:
+        return _session_not_found()
+    
+    return jsonify({
+        'success': True,
+        'session_id': session_id,
+        'frame_reuse': frame_reuse
+    })
+
+
 @app.route('/session/<session_id>/reset', methods=['POST'])
 def reset_session(session_id):
     """Reset a proctoring session"""
-    if session_id in session_engines:
-        session_engines[session_id].reset_session()
-        return jsonify({
-            'success': True,
-            'message': f'Session {session_id} reset successfully'
-        })
-    else:
-        return jsonify({
-            'success': False,
-            'error': 'Session not found'
-        }), 404
+    try:
+        _session_call(session_id, 'reset')
+    except SessionNotFound:
+        return _session_not_found()
+    
+    return jsonify({
+        'success': True,
+        'message': f'Session {session_id} reset successfully'
+    })
 
 
 @app.route('/session/<session_id>/delete', methods=['DELETE'])
 def delete_session(session_id):
     """Delete a proctoring session"""
-    if session_id in session_engines:
-        del session_engines[session_id]
-        return jsonify({
-            'success': True,
-            'message': f'Session {session_id} deleted successfully'
-        })
-    else:
-        return jsonify({
-            'success': False,
-            'error': 'Session not found'
-        }), 404
+    try:
+        result = _session_call(session_id, 'delete')
+    except SessionNotFound:
+        return _session_not_found()
+    
+    return jsonify({
+        'success': True,
+        'message': f'Session {session_id} deleted successfully',
+        # Aggregate windows not yet handed out, including the final ones
+        'windows': result['windows']
+    })
 
 
 @app.route('/sessions', methods=['GET'])
 def list_sessions():
     """List all active sessions"""
+    if worker_pool is not None:
+        active_sessions = [sid for ids in worker_pool.broadcast('list') for sid in ids]
+        registry_stats = worker_pool.broadcast('registry_stats')
+    else:
+        active_sessions = session_registry.ids()
+        registry_stats = [session_registry.stats()]
+    
     return jsonify({
         'success': True,
-        'active_sessions': list(session_engines.keys()),
-        'total_sessions': len(session_engines)
+        'active_sessions': active_sessions,
+        'total_sessions': len(active_sessions),
+        'registry': registry_stats
     })
 
 def test_face_detector_init():
@@ -239,21 +693,59 @@ def test_face_detector_init():
     
     print("=" * 60)
 
-# Run the test
-test_face_detector_init()
-
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Proctoring Service')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of analysis worker processes (sessions are sharded by id)')
+    parser.add_argument('--self-test', action='store_true',
+                        help='run the dlib face detector diagnostic and exit')
+    args = parser.parse_args()
+    
+    if args.self_test:
+        test_face_detector_init()
+        raise SystemExit(0)
+    
+    # Exit normally on SIGTERM too, so atexit handlers (journal flush,
+    # worker shutdown) run on a clean stop
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    if args.workers > 1:
+        # Workers must inherit warmed models, so load them before forking
+        start_warm_up(wait=True)
+        worker_pool = WorkerPool(args.workers)
+        # Let workers flush their session journals before the process exits
+        atexit.register(worker_pool.shutdown)
+    else:
+        # Serve /health immediately; /ready flips once models are warm
+        start_warm_up()
+    
     print("=" * 60)
     print("Starting Proctoring Service...")
     print("=" * 60)
     print(f"Service running on: http://localhost:5001")
     print("Available endpoints:")
     print("  - GET  /health")
+    print("  - GET  /ready")
+    print("  - GET  /metrics")
     print("  - POST /analyze-frame")
+    print("  - POST /analyze-frame/binary")
+    print("  - WS   /stream/<id>")
+    print("  - POST /session/<id>/audio")
+    print("  - WS   /stream/<id>/audio")
     print("  - GET  /session/<id>/activity-log")
+    print("  - GET  /session/<id>/aggregates")
+    print("  - POST /session/<id>/aggregates/close")
+    print("  - WS   /stream/<id>/aggregates")
     print("  - GET  /session/<id>/summary")
+    print("  - GET  /session/<id>/face-tracking")
+    print("  - GET  /session/<id>/object-detection")
+    print("  - GET  /session/<id>/frame-reuse")
     print("  - POST /session/<id>/reset")
     print("  - DELETE /session/<id>/delete")
     print("  - GET  /sessions")
     print("=" * 60)
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    if worker_pool is not None:
+        # The reloader would fork a second copy of the pool
+        app.run(host='0.0.0.0', port=5001, debug=False, threaded=True)
+    else:
+        app.run(host='0.0.0.0', port=5001, debug=True)
@@ -1,75 +1,170 @@
 # proctoring_engine.py - Complete OpenCV Version
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from detectors.face_detector import FaceDetector
+from detectors.eye_locator import EyeLocator
 from detectors.eye_gaze_detector import EyeGazeDetector
 from detectors.head_pose_detector import HeadPoseDetector
-from detectors.object_detector import ObjectDetector
+from detectors.object_detector import ObjectDetector, labels_of
 from detectors.blink_detector import BlinkDetector
+from detectors.frame_context import FrameContext, frame_buffer_pool
+
+from model_registry import get_model_registry
+from object_scheduler import ObjectDetectionScheduler
+from frame_cache import FrameReuseCache
+from audio_analyzer import AudioStreamAnalyzer
+from profiles import get_profile, load_shedder
+from activity_store import ActivityStore
+from window_aggregates import WindowAggregator
+from config import Config
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Reported for the face chain when it misses the frame deadline
+TIMED_OUT_FACE_RESULT = {
+    'face_status': 'timeout',
+    'faces_count': 0,
+    'gaze_direction': 'timeout',
+    'head_pose': 'timeout',
+    'blink_status': 'timeout',
+    'blink_count': 0
+}
+
+_stage_pool = None
+_stage_pool_pid = None
+_stage_pool_lock = threading.Lock()
+
+
+def _get_stage_pool():
+    """Thread pool shared by every session's parallel stages (one per process)"""
+    global _stage_pool, _stage_pool_pid
+    if _stage_pool_pid != os.getpid():
+        with _stage_pool_lock:
+            if _stage_pool_pid != os.getpid():
+                _stage_pool = ThreadPoolExecutor(
+                    max_workers=Config.DETECTOR_THREADS, thread_name_prefix='detector-stage'
+                )
+                _stage_pool_pid = os.getpid()
+    return _stage_pool
 
 class ProctoringEngine:
-    def __init__(self):
-        print("Initializing complete proctoring engine...")
-        try:
-            # Initialize all detectors
-            self.face_detector = FaceDetector()
-            self.eye_gaze_detector = EyeGazeDetector()
-            self.head_pose_detector = HeadPoseDetector()
-            self.object_detector = ObjectDetector()
-            self.blink_detector = BlinkDetector()
-            
-            print("All detectors initialized successfully")
-        except Exception as e:
-            print(f"Failed to initialize detectors: {e}")
-            raise e
+    def __init__(self, models=None):
+        # Models are loaded once per process and shared by every session;
+        # the engine itself only carries per-session state (blink counters,
+        # activity log), so constructing one is cheap.
+        self.models = models or get_model_registry()
+
+        self.face_detector = FaceDetector(self.models)
+        self.eye_locator = EyeLocator(self.models)
+        self.eye_gaze_detector = EyeGazeDetector()
+        self.head_pose_detector = HeadPoseDetector()
+        self.object_detector = ObjectDetector(self.models)
+        self.blink_detector = BlinkDetector()
+        
+        # Decides which frames get a (costly) YOLO pass
+        self.object_scheduler = ObjectDetectionScheduler()
+        
+        # Last fully analyzed frame, reused for near-identical frames
+        self.frame_cache = FrameReuseCache()
+        
+        # Created on the first audio chunk; most sessions send none
+        self.audio = None
+        
+        self.activity_log = ActivityStore()
+        
+        # 10 s / 1 min rollups computed from the activity log
+        self.aggregates = WindowAggregator(self.activity_log)
+        
+        # Parallel mode: face count of the previous frame (for the YOLO
+        # scheduler) and stages still running past their frame's deadline
+        self.last_face_count = 0
+        self._late_faces = None             # (frame timestamp, future) of the face chain
+        self._late_objects = None           # future of the YOLO stage
         
-        self.activity_log = []
+        # Drive the recommended capture rate (monotonic clock)
+        self.started = time.monotonic()
+        self.last_violation = None
     
     def analyze_frame(self, frame):
         """Complete proctoring analysis"""
         timestamp = datetime.now().isoformat()
         
+        started = time.perf_counter()
+        buffers = None
         try:
-            # Face detection
-            face_status, faces = self.face_detector.detect(frame)
+            # Face result of an earlier frame that finished after its deadline
+            late_faces = self._collect_late_stages()
             
-            # Other detections
-            gaze_status = self.eye_gaze_detector.detect(faces, frame)
-            head_pose = self.head_pose_detector.detect(faces, frame)
-            detected_objects = self.object_detector.detect(frame)
-            blink_status, blink_count = self.blink_detector.detect(faces, frame)
+            thumb = None
+            if Config.FRAME_REUSE_ENABLED:
+                with metrics.timer('fingerprint'):
+                    thumb = self.frame_cache.fingerprint(frame)
+                result, cached = self.frame_cache.lookup(thumb)
+                metrics.inc('proctoring_frame_reuse_total', result=result)
+                if cached is not None:
+                    analysis = self._reuse_analysis(timestamp, cached)
+                    self._attach_late_faces(analysis, late_faces)
+                    self._attach_audio(analysis)
+                    self._record(analysis)
+                    metrics.observe('proctoring_stage_duration_seconds', time.perf_counter() - started, stage='total')
+                    metrics.inc('proctoring_frames_total', outcome='reused')
+                    return analysis
             
-            # Determine suspicious activities
-            suspicious_activity = []
+            # Cheaper profile while the service is overloaded
+            profile = get_profile(load_shedder.current_profile())
+            self.object_scheduler.interval = profile['object_detection_interval']
             
-            if face_status in ['multiple_faces', 'no_face']:
-                suspicious_activity.append('face_anomaly')
+            # Resize + grayscale once, into pooled scratch arrays; every
+            # detector reads from this
+            buffers = frame_buffer_pool.acquire()
+            with metrics.timer('prepare'):
+                ctx = FrameContext(frame, profile, buffers)
             
-            if gaze_status == 'looking_away':
-                suspicious_activity.append('looking_away')
+            if Config.PARALLEL_DETECTORS:
+                face_result, object_detections, incomplete, running = self._run_parallel(ctx, timestamp)
+                if running:
+                    # Stages left past the deadline keep reading the buffers
+                    frame_buffer_pool.release_after(buffers, running)
+                    buffers = None
+            else:
+                face_result = self._face_chain(ctx)
+                object_detections = self._detect_objects(ctx, len(ctx.faces))
+                incomplete = []
             
-            if head_pose == 'head_turned':
-                suspicious_activity.append('head_movement')
+            analysis = self._build_analysis(timestamp, face_result, object_detections)
+            analysis['profile'] = profile['name']
+            metrics.inc('proctoring_profile_frames_total', profile=profile['name'])
+            if incomplete:
+                analysis['partial'] = True
+                analysis['incomplete_stages'] = incomplete
             
-            if len(detected_objects) > 0:
-                suspicious_activity.append('objects_detected')
+            if thumb is not None:
+                # Partial results must not be repeated for later frames
+                if incomplete:
+                    self.frame_cache.clear()
+                else:
+                    self.frame_cache.store(thumb, analysis)
             
-            analysis = {
-                'timestamp': timestamp,
-                'face_status': face_status,
-                'faces_count': len(faces),
-                'gaze_direction': gaze_status,
-                'head_pose': head_pose,
-                'detected_objects': detected_objects,
-                'blink_status': blink_status,
-                'blink_count': blink_count,
-                'suspicious_activity': suspicious_activity
-            }
+            self._attach_late_faces(analysis, late_faces)
+            self._attach_audio(analysis)
+            self._record(analysis)
             
-            self.activity_log.append(analysis)
+            metrics.observe('proctoring_stage_duration_seconds', time.perf_counter() - started, stage='total')
+            metrics.inc('proctoring_frames_total', outcome='partial' if incomplete else 'ok')
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Frame %s: faces=%d objects=%s suspicious=%s",
+                             ctx.frame.shape, analysis['faces_count'],
+                             analysis['detected_objects'], analysis['suspicious_activity'])
             return analysis
             
         except Exception as e:
-            print(f"Error in analyze_frame: {e}")
+            logger.exception("Error in analyze_frame: %s", e)
+            metrics.inc('proctoring_frames_total', outcome='error')
             return {
                 'timestamp': timestamp,
                 'error': str(e),
@@ -78,15 +173,314 @@ class ProctoringEngine:
                 'gaze_direction': 'error',
                 'head_pose': 'error',
                 'detected_objects': [],
+                'object_detections': [],
                 'blink_status': 'error',
                 'blink_count': 0,
                 'suspicious_activity': ['analysis_error']
             }
+        finally:
+            if buffers is not None:
+                frame_buffer_pool.release(buffers)
+    
+    def _record(self, analysis):
+        self.activity_log.append(analysis)
+        self.aggregates.observe()
+        if analysis['suspicious_activity']:
+            self.last_violation = time.monotonic()
+    
+    def recommend_capture(self):
+        """
+        Capture settings for the client's next frame: denser right after a
+        violation, sparser once the candidate has been calm for a while,
+        and backed off while the service is shedding load. Resolution and
+        JPEG quality follow the current profile, so clients don't send
+        pixels that would only be downscaled.
+        """
+        profile = get_profile(load_shedder.current_profile())
+        
+        # Seconds since the last violation (or since the session started)
+        quiet = time.monotonic() - (self.last_violation or self.started)
+        if self.last_violation is not None and quiet < Config.CAPTURE_ALERT_SECONDS:
+            interval, reason = Config.CAPTURE_INTERVAL_ALERT_MS, 'recent_violation'
+        elif quiet >= Config.CAPTURE_CALM_SECONDS:
+            interval, reason = Config.CAPTURE_INTERVAL_CALM_MS, 'calm'
+        else:
+            interval, reason = Config.CAPTURE_INTERVAL_MS, 'normal'
+        
+        if load_shedder.level:
+            # Halve the rate for every profile step shed
+            interval = min(interval * 2 ** load_shedder.level, Config.CAPTURE_INTERVAL_MAX_MS)
+            reason = 'server_load'
+        
+        return {
+            'interval_ms': interval,
+            'max_width': profile['max_width'],
+            'max_height': profile['max_height'],
+            'jpeg_quality': profile['jpeg_quality'],
+            'reason': reason
+        }
+    
+    def _face_chain(self, ctx):
+        """Face detection followed by everything that depends on faces"""
+        with metrics.timer('face'):
+            face_status, faces = self.face_detector.detect(ctx)
+        
+        if ctx.profile['eyes']:
+            # Single eye pass feeds both gaze and blink analysis
+            with metrics.timer('eyes'):
+                self.eye_locator.detect(ctx)
+            
+            with metrics.timer('gaze'):
+                gaze_status = self.eye_gaze_detector.detect(ctx)
+            with metrics.timer('blink'):
+                blink_status, blink_count = self.blink_detector.detect(ctx)
+        else:
+            # Eye stage disabled by the profile
+            gaze_status = 'skipped'
+            blink_status, blink_count = 'skipped', self.blink_detector.blink_count
+        
+        with metrics.timer('head_pose'):
+            head_pose = self.head_pose_detector.detect(ctx)
+        
+        self.last_face_count = len(faces)
+        return {
+            'face_status': face_status,
+            'faces_count': len(faces),
+            'gaze_direction': gaze_status,
+            'head_pose': head_pose,
+            'blink_status': blink_status,
+            'blink_count': blink_count
+        }
+    
+    def _detect_objects(self, ctx, face_count):
+        """Run YOLO when the scheduler asks for it, else reuse the last result"""
+        run, reason = self.object_scheduler.should_run(ctx, face_count)
+        metrics.inc('proctoring_object_detection_total', reason=reason)
+        if run:
+            with metrics.timer('yolo'):
+                detections = self.object_detector.detect_detailed(ctx)
+            self.object_scheduler.record_run(ctx, detections, face_count)
+            return detections
+        
+        self.object_scheduler.record_skip()
+        return list(self.object_scheduler.last_detections)
+    
+    def _run_parallel(self, ctx, timestamp):
+        """
+        Run the face chain and object detection concurrently on the shared
+        stage pool. Stages still running at the frame deadline are
+        reported as incomplete and left to finish in the background.
+        Later frames don't wait for them: while a stage of an earlier
+        frame is still running (it owns that stage's per-session state),
+        the stage is skipped and reported as incomplete, and a face result
+        that arrives late is published with the next analysis
+        (_attach_late_faces).
+        """
+        pool = _get_stage_pool()
+        face_future = object_future = None
+        if self._late_faces is None:
+            face_future = pool.submit(self._face_chain, ctx)
+        if self._late_objects is None:
+            # Faces for this frame aren't known yet; schedule YOLO on the last count
+            object_future = pool.submit(self._detect_objects, ctx, self.last_face_count)
+        
+        deadline = Config.FRAME_DEADLINE_MS / 1000.0 if Config.FRAME_DEADLINE_MS else None
+        wait([f for f in (face_future, object_future) if f is not None], timeout=deadline)
+        
+        incomplete = []
+        running = [f for f in (face_future, object_future) if f is not None and not f.done()]
+        if face_future is not None and face_future.done():
+            face_result = face_future.result()
+        else:
+            incomplete.append('faces')
+            face_result = dict(TIMED_OUT_FACE_RESULT)
+            if face_future is not None:
+                self._late_faces = (timestamp, face_future)
+        
+        if object_future is not None and object_future.done():
+            object_detections = object_future.result()
+        else:
+            incomplete.append('objects')
+            # Best available answer: the last completed YOLO result
+            object_detections = list(self.object_scheduler.last_detections)
+            if object_future is not None:
+                self._late_objects = object_future
+        
+        return face_result, object_detections, incomplete, running
+    
+    def _collect_late_stages(self):
+        """
+        Pick up stages of earlier frames that have finished since their
+        deadline. A late YOLO result is already in the scheduler; a late
+        face result is returned (with its frame's timestamp) to be
+        published with the current frame.
+        """
+        late_faces = None
+        if self._late_faces is not None and self._late_faces[1].done():
+            timestamp, future = self._late_faces
+            self._late_faces = None
+            if future.exception() is not None:
+                logger.error("Late face chain failed: %s", future.exception())
+            else:
+                late_faces = {'timestamp': timestamp, **future.result()}
+        
+        if self._late_objects is not None and self._late_objects.done():
+            if self._late_objects.exception() is not None:
+                logger.error("Late object detection failed: %s", self._late_objects.exception())
+            self._late_objects = None
+        return late_faces
+    
+    def _attach_late_faces(self, analysis, late_faces):
+        """
+        Publish a face chain result that missed its own frame's deadline:
+        it is included as 'late_faces' and its violations are flagged on
+        this frame, so an overrunning face stage can't hide an absent or
+        second person.
+        """
+        if late_faces is None:
+            return
+        analysis['late_faces'] = late_faces
+        flags = [f for f in self._face_flags(late_faces) if f not in analysis['suspicious_activity']]
+        if flags:
+            # New list: the frame cache may hold the original
+            analysis['suspicious_activity'] = analysis['suspicious_activity'] + flags
+        analysis['blink_count'] = max(analysis['blink_count'], late_faces['blink_count'])
+    
+    def _reuse_analysis(self, timestamp, cached):
+        """
+        Result for a frame that matches the last analyzed one. Verdicts
+        are carried over unchanged; a blink can't recur on an identical
+        frame, so the blink status is reset and the count kept.
+        """
+        return {
+            **cached,
+            'timestamp': timestamp,
+            'blink_status': 'no_blink',
+            'reused': True,
+            'reused_from': cached['timestamp']
+        }
+    
+    def analyze_audio(self, pcm, sample_rate=None):
+        """
+        Feed a chunk of the candidate's 16-bit mono PCM audio.
+        Returns the features of every analysis window it completed.
+        """
+        if self.audio is None:
+            self.audio = AudioStreamAnalyzer(sample_rate)
+        elif sample_rate and sample_rate != self.audio.sample_rate:
+            self.audio.configure(sample_rate)
+        
+        with metrics.timer('audio'):
+            return self.audio.feed(pcm)
+    
+    def _attach_audio(self, analysis):
+        """Merge the audio heard since the previous frame into this frame's analysis"""
+        audio = self.audio.take_pending() if self.audio is not None else None
+        if audio is None:
+            return
+        analysis['audio'] = audio
+        if audio['loud_windows'] or (Config.AUDIO_FLAG_VOICE and audio['voice_windows']):
+            # New list: the frame cache may hold the original
+            analysis['suspicious_activity'] = analysis['suspicious_activity'] + ['suspicious_audio']
+    
+    def _face_flags(self, face_result):
+        """Suspicious activity flags raised by a face chain result"""
+        flags = []
+        
+        if face_result['face_status'] in ['multiple_faces', 'no_face']:
+            flags.append('face_anomaly')
+        
+        if face_result['gaze_direction'] == 'looking_away':
+            flags.append('looking_away')
+        
+        if face_result['head_pose'] == 'head_turned':
+            flags.append('head_movement')
+        
+        return flags
+    
+    def _build_analysis(self, timestamp, face_result, object_detections):
+        detected_objects = labels_of(object_detections)
+        
+        # Determine suspicious activities
+        suspicious_activity = self._face_flags(face_result)
+        
+        if len(detected_objects) > 0:
+            suspicious_activity.append('objects_detected')
+        
+        return {
+            'timestamp': timestamp,
+            'face_status': face_result['face_status'],
+            'faces_count': face_result['faces_count'],
+            'gaze_direction': face_result['gaze_direction'],
+            'head_pose': face_result['head_pose'],
+            'detected_objects': detected_objects,
+            'object_detections': object_detections,
+            'object_detection': self.object_scheduler.carried_over(),
+            'blink_status': face_result['blink_status'],
+            'blink_count': face_result['blink_count'],
+            'suspicious_activity': suspicious_activity
+        }
     
     def get_activity_log(self):
-        return self.activity_log
+        return self.activity_log.to_list()
+    
+    def get_activity_page(self, query):
+        """One page of the activity log, see ActivityStore.page for the query keys"""
+        entries, next_cursor = self.activity_log.page(**query)
+        return {
+            'entries': entries,
+            'next_cursor': next_cursor,
+            'first_seq': self.activity_log.first_seq
+        }
+    
+    def get_aggregates(self, query):
+        """Windowed aggregates of one size, see WindowAggregator.query for the query keys"""
+        return self.aggregates.query(now=time.time(), **query)
+    
+    def close_windows(self):
+        """End-of-session: close the windows in progress, return every window not yet handed out"""
+        return self.aggregates.close_all()
+    
+    def take_closed_windows(self):
+        """Aggregate windows closed since the last call (returned with each analysis)"""
+        return self.aggregates.take_new()
+    
+    def get_summary(self):
+        """Session summary from running counters - O(1)"""
+        return self.activity_log.summary()
+    
+    def memory_bytes(self):
+        """Rough per-session footprint (the activity log dominates)"""
+        audio_bytes = self.audio.nbytes if self.audio is not None else 0
+        return self.activity_log.nbytes + audio_bytes + self.aggregates.nbytes + 4096
+    
+    def resume_from_log(self):
+        """Carry running counters over from a restored activity log"""
+        # total_blinks is a running maximum, so the detector must continue from it
+        self.blink_detector.blink_count = self.activity_log.counters['total_blinks']
+    
+    def get_face_tracking_stats(self):
+        return self.face_detector.get_stats()
+    
+    def get_object_scheduling_stats(self):
+        return self.object_scheduler.get_stats()
+    
+    def get_frame_reuse_stats(self):
+        return self.frame_cache.get_stats()
+    
+    def get_audio_stats(self):
+        return self.audio.get_stats() if self.audio is not None else None
     
     def reset_session(self):
-        self.activity_log = []
+        self.activity_log.reset()
+        self.aggregates.reset()
+        self.started = time.monotonic()
+        self.last_violation = None
+        self.frame_cache.clear()
+        if self.audio is not None:
+            self.audio.reset()
+        self.face_detector.reset_tracking()
+        self.face_detector.reset_stats()
+        self.object_scheduler.reset()
         if hasattr(self.blink_detector, 'blink_count'):
             self.blink_detector.blink_count = 0
@@ -0,0 +1,147 @@
+# profiles.py - Named performance profiles and overload-driven profile switching
+import logging
+import threading
+import time
+from config import Config
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cheapest last; the load shedder steps down this list under overload
+PROFILE_ORDER = ['accurate', 'balanced', 'fast']
+
+
+def get_profile(name):
+    """
+    Detector settings for a profile. 'accurate' is the configured
+    baseline (PROCESSING_MAX_*, OBJECT_DETECTION_INTERVAL); the others
+    trade resolution, cascade scale steps, YOLO input size and the eye
+    stage (gaze + blink) for throughput. jpeg_quality (0-1, as for
+    canvas.toDataURL) is what clients are asked to encode frames with.
+    """
+    if name == 'accurate':
+        return {
+            'name': 'accurate',
+            'max_width': Config.PROCESSING_MAX_WIDTH,
+            'max_height': Config.PROCESSING_MAX_HEIGHT,
+            'face_scale_factor': 1.1,
+            'eye_scale_factor': 1.1,
+            'yolo_input_size': 416,
+            'object_detection_interval': Config.OBJECT_DETECTION_INTERVAL,
+            'eyes': True,
+            'jpeg_quality': 0.85
+        }
+    if name == 'balanced':
+        return {
+            'name': 'balanced',
+            'max_width': 640,
+            'max_height': 480,
+            'face_scale_factor': 1.15,
+            'eye_scale_factor': 1.15,
+            'yolo_input_size': 416,
+            'object_detection_interval': max(Config.OBJECT_DETECTION_INTERVAL, 4),
+            'eyes': True,
+            'jpeg_quality': 0.75
+        }
+    if name == 'fast':
+        return {
+            'name': 'fast',
+            'max_width': 480,
+            'max_height': 360,
+            'face_scale_factor': 1.25,
+            'eye_scale_factor': 1.2,
+            'yolo_input_size': 320,
+            'object_detection_interval': max(Config.OBJECT_DETECTION_INTERVAL, 6),
+            'eyes': False,
+            'jpeg_quality': 0.65
+        }
+    raise ValueError(f"Unknown performance profile: {name}")
+
+
+class LoadShedder:
+    """
+    Process-wide controller that moves every session to a cheaper
+    profile while the service is saturated and back once it recovers.
+
+    Load is the number of analyses in flight (plus the worker's request
+    queue in --workers mode) and an exponentially weighted average of
+    per-frame latency. Above LOAD_SHED_MAX_INFLIGHT or
+    LOAD_SHED_LATENCY_MS it steps one profile down; it steps back up only
+    after load has stayed below half of both limits for
+    LOAD_SHED_COOLDOWN_SECONDS, so it doesn't flap at the boundary.
+    """
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, base_profile=None):
+        self.base_index = PROFILE_ORDER.index(base_profile or Config.PERFORMANCE_PROFILE)
+        self.level = 0                      # profiles below the base
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.latency_ms = 0.0
+        self._lock = threading.Lock()
+        self._last_change = time.monotonic()
+        self._calm_since = None
+
+    @property
+    def max_level(self):
+        return len(PROFILE_ORDER) - 1 - self.base_index
+
+    def begin(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self, seconds):
+        with self._lock:
+            self.in_flight -= 1
+            self.latency_ms += self.EWMA_ALPHA * (seconds * 1000 - self.latency_ms)
+
+    def set_queue_depth(self, depth):
+        self.queue_depth = depth
+
+    def current_profile(self):
+        """Name of the profile new frames should use"""
+        if not Config.LOAD_SHEDDING_ENABLED:
+            return PROFILE_ORDER[self.base_index]
+
+        with self._lock:
+            now = time.monotonic()
+            load = self.in_flight + self.queue_depth
+            overloaded = (load > Config.LOAD_SHED_MAX_INFLIGHT
+                          or self.latency_ms > Config.LOAD_SHED_LATENCY_MS)
+            calm = (load <= Config.LOAD_SHED_MAX_INFLIGHT // 2
+                    and self.latency_ms < Config.LOAD_SHED_LATENCY_MS / 2)
+            self._calm_since = (self._calm_since or now) if calm else None
+
+            if overloaded and self.level < self.max_level and now - self._last_change >= 1.0:
+                self._change(self.level + 1, 'down', now)
+            elif (self.level > 0 and self._calm_since is not None
+                  and now - self._calm_since >= Config.LOAD_SHED_COOLDOWN_SECONDS
+                  and now - self._last_change >= Config.LOAD_SHED_COOLDOWN_SECONDS):
+                self._change(self.level - 1, 'up', now)
+
+            return PROFILE_ORDER[self.base_index + self.level]
+
+    def _change(self, level, direction, now):
+        """Switch level; caller holds the lock"""
+        self.level = level
+        self._last_change = now
+        self._calm_since = None
+        metrics.inc('proctoring_load_shed_transitions_total', direction=direction)
+        log = logger.warning if direction == 'down' else logger.info
+        log("Load shedding: switched to '%s' profile (in flight %d, queue %d, latency %.0f ms)",
+            PROFILE_ORDER[self.base_index + level], self.in_flight, self.queue_depth, self.latency_ms)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'base_profile': PROFILE_ORDER[self.base_index],
+                'current_profile': PROFILE_ORDER[self.base_index + self.level],
+                'level': self.level,
+                'in_flight': self.in_flight,
+                'queue_depth': self.queue_depth,
+                'latency_ewma_ms': round(self.latency_ms, 1)
+            }
+
+
+# Shared by every session in this process
+load_shedder = LoadShedder()
@@ -0,0 +1,323 @@
+# session_journal.py - Durable, append-only per-session activity log on disk
+import atexit
+import logging
+import os
+import shutil
+import struct
+import threading
+import time
+import numpy as np
+from activity_store import RECORD_DTYPE, COUNTER_NAMES, counters_of, merge_counters
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Segment layout:
+#   header  magic, format version, record size, sequence number of the first record
+#   records RECORD_DTYPE rows, back to back
+#   footer  record count + summary counters of this segment, written once
+#           the segment is full ("sealed"); the newest segment has none yet
+HEADER = struct.Struct('<4sHHQ')
+FOOTER = struct.Struct('<Q%dQ4s' % len(COUNTER_NAMES))
+MAGIC = b'PSLG'
+FOOTER_MAGIC = b'PEND'
+VERSION = 2                 # 2: audio_violations counter in the footer
+
+
+class _Segment:
+    __slots__ = ('path', 'first_seq', 'count', 'counters', 'sealed')
+
+    def __init__(self, path, first_seq, count=0, counters=None, sealed=False):
+        self.path = path
+        self.first_seq = first_seq
+        self.count = count
+        self.counters = counters or dict.fromkeys(COUNTER_NAMES, 0)
+        self.sealed = sealed
+
+
+def _read_segment(path):
+    """
+    Open an existing segment. Sealed segments are answered from their
+    footer alone; the open one is scanned (it holds at most one segment
+    of records) and any torn record at its end is cut off.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        magic, version, record_size, first_seq = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"Not a session journal segment: {path}")
+
+        if size >= HEADER.size + FOOTER.size:
+            f.seek(size - FOOTER.size)
+            footer = FOOTER.unpack(f.read(FOOTER.size))
+            expected = HEADER.size + footer[0] * RECORD_DTYPE.itemsize + FOOTER.size
+            if footer[-1] == FOOTER_MAGIC and expected == size:
+                counters = dict(zip(COUNTER_NAMES, footer[1:-1]))
+                return _Segment(path, first_seq, footer[0], counters, sealed=True)
+
+    count = (size - HEADER.size) // RECORD_DTYPE.itemsize
+    if HEADER.size + count * RECORD_DTYPE.itemsize != size:
+        with open(path, 'r+b') as f:
+            f.truncate(HEADER.size + count * RECORD_DTYPE.itemsize)
+    records = np.fromfile(path, RECORD_DTYPE, count=count, offset=HEADER.size)
+    return _Segment(path, first_seq, count, counters_of(records))
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SessionJournal:
+    """
+    Persists every session's activity log under `directory`, one
+    sub-directory per session (hex-encoded id) holding numbered segment
+    files of fixed-size binary records.
+
+    append() only copies the new rows into a pending buffer; a
+    background thread writes and fsyncs all pending rows every
+    `flush_interval_ms`, so the per-frame cost is a small array copy.
+    Up to one interval of analyses can be lost on a crash.
+
+    recover() rebuilds every session's summary counters from segment
+    footers (plus a scan of each session's newest, unsealed segment)
+    instead of replaying the whole log.
+
+    Sessions whose journal hasn't been written to for `retention_seconds`
+    are deleted by expire(), which runs after recover() and then every
+    EXPIRE_INTERVAL seconds on the flusher thread. `in_use(session_id)`,
+    if set, protects sessions that are still loaded in memory.
+    """
+    EXPIRE_INTERVAL = 600
+
+    def __init__(self, directory, segment_records=None, flush_interval_ms=None, retention_seconds=None):
+        self.directory = directory
+        self.segment_records = segment_records or Config.SESSION_JOURNAL_SEGMENT_RECORDS
+        self.retention = Config.SESSION_JOURNAL_RETENTION_SECONDS if retention_seconds is None else retention_seconds
+        self.in_use = None
+        self.expired = 0
+        interval_ms = flush_interval_ms or Config.SESSION_JOURNAL_FLUSH_INTERVAL_MS
+        self.flush_interval = interval_ms / 1000.0
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()       # _pending / _written
+        self._io_lock = threading.Lock()    # segment files / _segments
+        self._pending = {}                  # session_id -> [record arrays]
+        self._written = {}                  # session_id -> next sequence number to queue
+        self._segments = {}                 # session_id -> [_Segment], oldest first
+
+        self._thread = None
+        self._thread_pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _session_dir(self, session_id):
+        return os.path.join(self.directory, session_id.encode('utf-8').hex())
+
+    def recover(self, owns=None):
+        """
+        Index every persisted session (only those for which `owns(session_id)`
+        is true, if given), then expire old ones; returns the number indexed
+        """
+        with self._io_lock:
+            for name in sorted(os.listdir(self.directory)):
+                try:
+                    session_id = bytes.fromhex(name).decode('utf-8')
+                    if owns is not None and not owns(session_id):
+                        continue
+                    path = os.path.join(self.directory, name)
+                    segments = [
+                        _read_segment(os.path.join(path, f))
+                        for f in sorted(os.listdir(path)) if f.endswith('.seg')
+                    ]
+                except (ValueError, OSError, struct.error) as e:
+                    logger.error("Skipping unreadable journal entry %s: %s", name, e)
+                    continue
+                if segments:
+                    self._segments[session_id] = segments
+                    self._written[session_id] = segments[-1].first_seq + segments[-1].count
+
+        logger.info("Session journal: %d session(s) recovered from %s", len(self._segments), self.directory)
+        self.expire()
+        return len(self._segments)
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._written
+
+    def summary(self, session_id):
+        """(next_seq, counters) of a persisted session from its segment index"""
+        with self._io_lock:
+            segments = self._segments.get(session_id, [])
+            counters = dict.fromkeys(COUNTER_NAMES, 0)
+            for segment in segments:
+                counters = merge_counters(counters, segment.counters)
+            next_seq = segments[-1].first_seq + segments[-1].count if segments else 0
+        return next_seq, counters
+
+    def restore(self, session_id, store):
+        """Reload a persisted session's counters and newest entries into an ActivityStore"""
+        self.flush(session_id)
+        next_seq, counters = self.summary(session_id)
+
+        with self._io_lock:
+            # Newest segments only, just enough to fill the ring buffer
+            chunks, needed = [], store.capacity
+            for segment in reversed(self._segments.get(session_id, [])):
+                if needed <= 0:
+                    break
+                take = min(needed, segment.count)
+                offset = HEADER.size + (segment.count - take) * RECORD_DTYPE.itemsize
+                chunks.append(np.fromfile(segment.path, RECORD_DTYPE, count=take, offset=offset))
+                needed -= take
+
+        records = np.concatenate(chunks[::-1]) if chunks else np.empty(0, RECORD_DTYPE)
+        store.restore(records, next_seq, counters)
+
+    def append(self, session_id, store):
+        """
+        Queue the store's entries that haven't been persisted yet. Called
+        under the session's lock, so appends for one session never overlap.
+        """
+        with self._lock:
+            written = self._written.get(session_id, 0)
+        if store.next_seq <= written:
+            return
+        records = store.records(written, store.next_seq)
+
+        with self._lock:
+            self._pending.setdefault(session_id, []).append(records)
+            self._written[session_id] = store.next_seq
+        self._ensure_thread()
+
+    def remove(self, session_id):
+        """Drop a session's pending and persisted entries"""
+        with self._io_lock:
+            self._remove(session_id)
+
+    def _remove(self, session_id):
+        """remove(); caller holds _io_lock"""
+        with self._lock:
+            self._pending.pop(session_id, None)
+            self._written.pop(session_id, None)
+        self._segments.pop(session_id, None)
+        shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def expire(self):
+        """Delete sessions not written to for `retention` seconds; returns how many"""
+        if not self.retention:
+            return 0
+        cutoff = time.time() - self.retention
+        expired = 0
+        with self._io_lock:
+            for session_id, segments in list(self._segments.items()):
+                path = segments[-1].path if segments else self._session_dir(session_id)
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                except OSError:
+                    pass
+                with self._lock:
+                    if session_id in self._pending:
+                        continue
+                if self.in_use is not None and self.in_use(session_id):
+                    continue
+                self._remove(session_id)
+                expired += 1
+            self.expired += expired
+        if expired:
+            logger.info("Session journal: %d session(s) expired after %ss idle", expired, self.retention)
+        return expired
+
+    def flush(self, session_id=None):
+        """Write and fsync everything queued so far (for one session, if given)"""
+        # Swapping under _io_lock keeps remove() from interleaving with a
+        # write of rows it just dropped
+        with self._io_lock:
+            with self._lock:
+                if session_id is None:
+                    pending, self._pending = self._pending, {}
+                elif session_id in self._pending:
+                    pending = {session_id: self._pending.pop(session_id)}
+                else:
+                    pending = {}
+            for session_id, chunks in pending.items():
+                try:
+                    self._write(session_id, np.concatenate(chunks))
+                except OSError as e:
+                    logger.error("Failed to persist session %s: %s", session_id, e)
+
+    def _write(self, session_id, records):
+        """Append records to the session's segments; caller holds _io_lock"""
+        segments = self._segments.setdefault(session_id, [])
+        directory = self._session_dir(session_id)
+
+        while len(records):
+            segment = segments[-1] if segments and not segments[-1].sealed else None
+            if segment is not None and segment.count >= self.segment_records:
+                # Full but unsealed: the process died between records and footer
+                with open(segment.path, 'ab') as f:
+                    self._seal(f, segment)
+                segment = None
+            if segment is None:
+                first_seq = segments[-1].first_seq + segments[-1].count if segments else 0
+                os.makedirs(directory, exist_ok=True)
+                segment = _Segment(os.path.join(directory, f'{first_seq:012d}.seg'), first_seq)
+                with open(segment.path, 'wb') as f:
+                    f.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, first_seq))
+                _fsync_dir(directory)
+                segments.append(segment)
+
+            chunk = records[:self.segment_records - segment.count]
+            records = records[len(chunk):]
+            segment.count += len(chunk)
+            segment.counters = merge_counters(segment.counters, counters_of(chunk))
+
+            with open(segment.path, 'ab') as f:
+                f.write(chunk.tobytes())
+                if segment.count >= self.segment_records:
+                    self._seal(f, segment)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _seal(self, f, segment):
+        f.write(FOOTER.pack(
+            segment.count, *(segment.counters[name] for name in COUNTER_NAMES), FOOTER_MAGIC
+        ))
+        segment.sealed = True
+
+    def _ensure_thread(self):
+        # (Re)start the flusher lazily, also in forked worker processes
+        if self._thread_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='session-journal', daemon=True)
+                self._thread.start()
+                self._thread_pid = os.getpid()
+
+    def _run(self):
+        next_expiry = time.monotonic() + self.EXPIRE_INTERVAL
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+                if time.monotonic() >= next_expiry:
+                    next_expiry = time.monotonic() + self.EXPIRE_INTERVAL
+                    self.expire()
+            except Exception as e:
+                logger.error("Session journal flush failed: %s", e)
+
+    def stats(self):
+        with self._lock:
+            pending = sum(len(chunk) for chunks in self._pending.values() for chunk in chunks)
+        with self._io_lock:
+            return {
+                'persisted_sessions': len(self._segments),
+                'expired_sessions': self.expired,
+                'segments': sum(len(s) for s in self._segments.values()),
+                'pending_records': pending
+            }
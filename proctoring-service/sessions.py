@@ -0,0 +1,340 @@
+# sessions.py - Session registry and per-session operations, shared by
+# in-process and worker-pool serving
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+import cv2
+import numpy as np
+from config import Config
+from metrics import metrics
+from proctoring_engine import ProctoringEngine
+from session_journal import SessionJournal
+from detectors.frame_context import frame_buffer_pool
+from profiles import load_shedder
+
+logger = logging.getLogger(__name__)
+
+
+class SessionNotFound(KeyError):
+    """Raised when an operation targets a session that doesn't exist"""
+    pass
+
+
+def decode_frame(buffer):
+    """Decode an encoded JPEG/PNG buffer (bytes or memoryview) into a BGR frame"""
+    # np.frombuffer wraps the buffer without copying it
+    np_arr = np.frombuffer(buffer, np.uint8)
+    if np_arr.size == 0:
+        return None
+    return cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+
+
+class _Entry:
+    __slots__ = ('engine', 'lock', 'last_used', 'memory')
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.lock = threading.Lock()        # one frame/op at a time per session
+        self.last_used = time.monotonic()
+        self.memory = 0                     # last memory_bytes() counted in the registry
+
+
+class SessionRegistry:
+    """
+    Thread-safe map of session_id -> ProctoringEngine.
+
+    Each session is created exactly once, even under concurrent first
+    requests. Sessions are evicted when idle for longer than `ttl`
+    seconds, and least-recently-used sessions are evicted when there
+    are more than `max_sessions` or their estimated memory exceeds
+    `memory_budget_mb`. `on_evict(session_id, engine)` is called for
+    every evicted session, outside the registry lock.
+    
+    With a `journal` (SessionJournal) every analysis is persisted, and a
+    session that is not in memory - evicted, or from before a restart -
+    is reloaded from disk the next time it is used.
+    """
+    def __init__(self, ttl=None, max_sessions=None, memory_budget_mb=None, on_evict=None, journal=None):
+        self.ttl = Config.SESSION_IDLE_TTL_SECONDS if ttl is None else ttl
+        self.max_sessions = Config.MAX_SESSIONS if max_sessions is None else max_sessions
+        budget_mb = Config.SESSION_MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb
+        self.memory_budget = budget_mb * 1024 * 1024 if budget_mb else None
+        self.on_evict = on_evict
+        self.journal = journal
+        if journal is not None:
+            # Never expire the journal of a session that is still loaded
+            journal.in_use = self.__contains__
+        
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()       # least recently used first
+        self._memory = 0
+        self.counters = {'created': 0, 'deleted': 0, 'evicted_ttl': 0, 'evicted_capacity': 0, 'evicted_memory': 0}
+    
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._entries
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def ids(self):
+        self.sweep()
+        with self._lock:
+            return list(self._entries.keys())
+    
+    @contextmanager
+    def session(self, session_id, create=False):
+        """
+        Yield the session's engine while holding its lock.
+        Raises SessionNotFound if it doesn't exist and create is False.
+        """
+        evicted = []
+        restoring = False
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                persisted = self.journal is not None and session_id in self.journal
+                if not create and not persisted:
+                    raise SessionNotFound(session_id)
+                entry = _Entry(ProctoringEngine())
+                if persisted:
+                    # Reloaded below, outside the registry lock; until then
+                    # the entry is a placeholder whose lock we hold, so other
+                    # requests for this session wait for the restore
+                    entry.lock.acquire()
+                    restoring = True
+                self._entries[session_id] = entry
+                self.counters['created'] += 1
+            # Buffers and audio grow after creation; re-estimate on every use
+            memory = entry.engine.memory_bytes()
+            self._memory += memory - entry.memory
+            entry.memory = memory
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(session_id)
+            evicted = self._collect_evictions(keep=session_id)
+        
+        self._run_hooks(evicted)
+        
+        if restoring:
+            try:
+                self.journal.restore(session_id, entry.engine.activity_log)
+                entry.engine.resume_from_log()
+            except BaseException:
+                with self._lock:
+                    if self._entries.get(session_id) is entry:
+                        del self._entries[session_id]
+                        self._memory -= entry.memory
+                entry.lock.release()
+                raise
+        else:
+            entry.lock.acquire()
+        
+        try:
+            yield entry.engine
+        finally:
+            entry.lock.release()
+    
+    def remove(self, session_id):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            persisted = self.journal is not None and session_id in self.journal
+            if entry is None and not persisted:
+                raise SessionNotFound(session_id)
+            if entry is not None:
+                self._memory -= entry.memory
+            self.counters['deleted'] += 1
+        if persisted:
+            self.journal.remove(session_id)
+        metrics.forget_session(session_id)
+    
+    def persist(self, session_id, engine):
+        """Queue the session's new activity entries for the journal, if any"""
+        if self.journal is not None:
+            self.journal.append(session_id, engine.activity_log)
+    
+    def forget_persisted(self, session_id):
+        """Drop the session's journal (its log was reset)"""
+        if self.journal is not None:
+            self.journal.remove(session_id)
+    
+    def close(self):
+        """Write out anything the journal still holds"""
+        if self.journal is not None:
+            self.journal.flush()
+    
+    def sweep(self):
+        """Evict idle / over-budget sessions now"""
+        with self._lock:
+            evicted = self._collect_evictions()
+        self._run_hooks(evicted)
+    
+    def _collect_evictions(self, keep=None):
+        """Pop sessions that must go; caller holds the lock"""
+        evicted = []
+        
+        def pop_oldest(reason):
+            session_id, entry = self._entries.popitem(last=False)
+            self._memory -= entry.memory
+            self.counters[reason] += 1
+            evicted.append((session_id, entry))
+        
+        # Entries are in last-used order, so expired ones are at the front
+        if self.ttl:
+            deadline = time.monotonic() - self.ttl
+            while self._entries:
+                session_id, entry = next(iter(self._entries.items()))
+                if session_id == keep or entry.last_used > deadline:
+                    break
+                pop_oldest('evicted_ttl')
+        
+        while self.max_sessions and len(self._entries) > self.max_sessions:
+            pop_oldest('evicted_capacity')
+        
+        while self.memory_budget and self._memory > self.memory_budget and len(self._entries) > 1:
+            pop_oldest('evicted_memory')
+        
+        return evicted
+    
+    def _run_hooks(self, evicted):
+        for session_id, entry in evicted:
+            metrics.forget_session(session_id)
+            if self.on_evict is None:
+                continue
+            try:
+                # Wait for any in-flight frame so the flush sees a complete log
+                with entry.lock:
+                    self.on_evict(session_id, entry.engine)
+            except Exception as e:
+                logger.error("Error in eviction hook for session %s: %s", session_id, e)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'active_sessions': len(self._entries),
+                'max_sessions': self.max_sessions,
+                'idle_ttl_seconds': self.ttl,
+                'estimated_memory_bytes': self._memory,
+                'memory_budget_bytes': self.memory_budget,
+                **self.counters,
+                **(self.journal.stats() if self.journal is not None else {}),
+                # Scratch arrays shared by all sessions (not in the estimate above)
+                'frame_buffers': frame_buffer_pool.stats()
+            }
+
+
+def flush_activity_log_to(directory):
+    """Eviction hook: write the session's summary + log as NDJSON into directory"""
+    os.makedirs(directory, exist_ok=True)
+    
+    def flush(session_id, engine):
+        safe_id = ''.join(c if c.isalnum() or c in '-_' else '_' for c in session_id)
+        path = os.path.join(directory, f'{safe_id}-{int(time.time())}.ndjson')
+        with open(path, 'w') as f:
+            f.write(json.dumps({'session_id': session_id, 'summary': engine.get_summary()}) + '\n')
+            for entry in engine.activity_log.entries():
+                f.write(json.dumps(entry) + '\n')
+    
+    return flush
+
+
+def create_session_registry(owns=None):
+    """
+    SessionRegistry configured from Config. With a journal, only the
+    persisted sessions for which `owns(session_id)` is true are recovered
+    (a worker process recovers just the sessions routed to it).
+    """
+    on_evict = None
+    if Config.SESSION_EVICTION_FLUSH_DIR:
+        on_evict = flush_activity_log_to(Config.SESSION_EVICTION_FLUSH_DIR)
+    
+    journal = None
+    if Config.SESSION_JOURNAL_DIR:
+        journal = SessionJournal(Config.SESSION_JOURNAL_DIR)
+    registry = SessionRegistry(on_evict=on_evict, journal=journal)
+    if journal is not None:
+        journal.recover(owns)
+    return registry
+
+
+def run_session_op(registry, session_id, op, *args):
+    """
+    Execute one session operation against a SessionRegistry.
+
+    'analyze' takes an encoded frame buffer and creates the session on
+    first use (returns None if the image can't be decoded); 'audio'
+    takes raw PCM plus a sample rate and also creates the session. Every other
+    op raises SessionNotFound for unknown sessions, except 'list',
+    'registry_stats', 'metrics' and 'load_shedding', which ignore session_id.
+    """
+    if op == 'analyze':
+        started = time.perf_counter()
+        load_shedder.begin()
+        try:
+            with metrics.timer('decode'):
+                frame = decode_frame(args[0])
+            if frame is None:
+                metrics.inc('proctoring_frames_total', outcome='decode_failed')
+                return None
+            # Get or create engine - cheap, models are shared across sessions
+            with registry.session(session_id, create=True) as engine:
+                analysis = engine.analyze_frame(frame)
+                registry.persist(session_id, engine)
+                # Not part of the analysis itself; the API lifts it out
+                analysis['capture'] = engine.recommend_capture()
+                analysis['windows'] = engine.take_closed_windows()
+        finally:
+            # Includes waiting for the session lock - that is load too
+            load_shedder.end(time.perf_counter() - started)
+        metrics.inc('proctoring_session_frames_total', session_id=session_id)
+        return analysis
+    
+    if op == 'audio':
+        # args: raw PCM bytes, sample rate (or None)
+        with registry.session(session_id, create=True) as engine:
+            windows = engine.analyze_audio(*args)
+            return {'windows': windows, 'audio': engine.get_audio_stats()}
+    
+    if op == 'list':
+        return registry.ids()
+    if op == 'registry_stats':
+        return registry.stats()
+    if op == 'metrics':
+        return metrics.snapshot()
+    if op == 'load_shedding':
+        return load_shedder.stats()
+    if op == 'delete':
+        # Hand out the session's last aggregate windows before it goes
+        windows = []
+        if session_id in registry:
+            with registry.session(session_id) as engine:
+                windows = engine.close_windows()
+        registry.remove(session_id)
+        return {'windows': windows}
+    
+    with registry.session(session_id) as engine:
+        if op == 'activity_log':
+            return engine.get_activity_log()
+        if op == 'activity_page':
+            return engine.get_activity_page(args[0])
+        if op == 'aggregates':
+            return engine.get_aggregates(args[0])
+        if op == 'close_windows':
+            return engine.close_windows()
+        if op == 'summary':
+            return engine.get_summary()
+        if op == 'face_tracking':
+            return engine.get_face_tracking_stats()
+        if op == 'object_detection':
+            return engine.get_object_scheduling_stats()
+        if op == 'frame_reuse':
+            return engine.get_frame_reuse_stats()
+        if op == 'reset':
+            engine.reset_session()
+            registry.forget_persisted(session_id)
+            return True
+    
+    raise ValueError(f"Unknown session operation: {op}")
@@ -0,0 +1,190 @@
+# tests/test_session_journal.py - Segment format, recovery and torn-write handling
+import os
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from activity_store import ActivityStore, RECORD_DTYPE
+from session_journal import FOOTER, HEADER, SessionJournal
+
+START = datetime(2026, 1, 1, 9, 0, 0)
+
+
+def _analysis(i, suspicious=()):
+    return {
+        'timestamp': (START + timedelta(seconds=i)).isoformat(),
+        'face_status': 'no_face' if 'face_anomaly' in suspicious else 'normal',
+        'faces_count': 0 if 'face_anomaly' in suspicious else 1,
+        'gaze_direction': 'center',
+        'head_pose': 'normal',
+        'blink_status': 'no_blink',
+        'blink_count': i // 3,
+        'detected_objects': [],
+        'suspicious_activity': list(suspicious)
+    }
+
+
+def _fill(store, count, start=0):
+    for i in range(start, start + count):
+        store.append(_analysis(i, ('face_anomaly',) if i % 4 == 0 else ()))
+
+
+def _persist(journal, session_id, store):
+    journal.append(session_id, store)
+    journal.flush()
+
+
+def _segment_files(directory, session_id):
+    path = os.path.join(directory, session_id.encode('utf-8').hex())
+    return [os.path.join(path, f) for f in sorted(os.listdir(path))]
+
+
+@pytest.fixture
+def journal_dir(tmp_path):
+    return str(tmp_path / 'journal')
+
+
+def test_restore_round_trip(journal_dir):
+    journal = SessionJournal(journal_dir, segment_records=4)
+    store = ActivityStore(capacity=100)
+    _fill(store, 10)
+    _persist(journal, 'cand-1', store)
+
+    recovered = SessionJournal(journal_dir, segment_records=4)
+    recovered.recover()
+    restored = ActivityStore(capacity=100)
+    recovered.restore('cand-1', restored)
+
+    assert restored.next_seq == 10
+    assert restored.counters == store.counters
+    assert list(restored.entries()) == list(store.entries())
+
+
+def test_full_segments_are_sealed_with_footer(journal_dir):
+    journal = SessionJournal(journal_dir, segment_records=4)
+    store = ActivityStore(capacity=100)
+    _fill(store, 10)
+    _persist(journal, 'cand-1', store)
+
+    files = _segment_files(journal_dir, 'cand-1')
+    assert [os.path.basename(f) for f in files] == ['000000000000.seg', '000000000004.seg', '000000000008.seg']
+    sealed_size = HEADER.size + 4 * RECORD_DTYPE.itemsize + FOOTER.size
+    assert [os.path.getsize(f) for f in files] == [sealed_size, sealed_size, HEADER.size + 2 * RECORD_DTYPE.itemsize]
+
+    recovered = SessionJournal(journal_dir, segment_records=4)
+    assert recovered.recover() == 1
+    assert recovered.summary('cand-1') == (10, store.counters)
+
+
+def test_torn_record_is_truncated_on_recovery(journal_dir):
+    journal = SessionJournal(journal_dir, segment_records=100)
+    store = ActivityStore(capacity=100)
+    _fill(store, 5)
+    _persist(journal, 'cand-1', store)
+
+    # Crash in the middle of writing the sixth record
+    path = _segment_files(journal_dir, 'cand-1')[-1]
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * (RECORD_DTYPE.itemsize // 2))
+
+    recovered = SessionJournal(journal_dir, segment_records=100)
+    recovered.recover()
+    assert os.path.getsize(path) == HEADER.size + 5 * RECORD_DTYPE.itemsize
+    assert recovered.summary('cand-1') == (5, store.counters)
+
+    # Appending continues right after the last complete record
+    restored = ActivityStore(capacity=100)
+    recovered.restore('cand-1', restored)
+    _fill(restored, 3, start=5)
+    _persist(recovered, 'cand-1', restored)
+    records = np.fromfile(path, RECORD_DTYPE, offset=HEADER.size)
+    assert len(records) == 8
+    assert list(records['blink_count']) == [i // 3 for i in range(8)]
+
+
+def test_full_unsealed_segment_is_sealed_before_appending(journal_dir):
+    journal = SessionJournal(journal_dir, segment_records=4)
+    store = ActivityStore(capacity=100)
+    _fill(store, 4)
+    _persist(journal, 'cand-1', store)
+
+    # Crash between the last record and the footer
+    path = _segment_files(journal_dir, 'cand-1')[0]
+    with open(path, 'r+b') as f:
+        f.truncate(HEADER.size + 4 * RECORD_DTYPE.itemsize)
+
+    recovered = SessionJournal(journal_dir, segment_records=4)
+    recovered.recover()
+    restored = ActivityStore(capacity=100)
+    recovered.restore('cand-1', restored)
+    _fill(restored, 2, start=4)
+    _persist(recovered, 'cand-1', restored)
+
+    files = _segment_files(journal_dir, 'cand-1')
+    assert len(files) == 2
+    assert os.path.getsize(files[0]) == HEADER.size + 4 * RECORD_DTYPE.itemsize + FOOTER.size
+    assert SessionJournal(journal_dir, segment_records=4).recover() == 1
+
+
+def test_unreadable_session_is_skipped(journal_dir):
+    journal = SessionJournal(journal_dir)
+    store = ActivityStore(capacity=10)
+    _fill(store, 2)
+    _persist(journal, 'good', store)
+
+    bad = os.path.join(journal_dir, 'bad'.encode('utf-8').hex())
+    os.makedirs(bad)
+    with open(os.path.join(bad, '000000000000.seg'), 'wb') as f:
+        f.write(b'JUNK' + b'\x00' * 12)
+
+    recovered = SessionJournal(journal_dir)
+    assert recovered.recover() == 1
+    assert 'good' in recovered
+    assert 'bad' not in recovered
+
+
+def test_remove_drops_pending_and_persisted(journal_dir):
+    journal = SessionJournal(journal_dir)
+    store = ActivityStore(capacity=10)
+    _fill(store, 3)
+    _persist(journal, 'cand-1', store)
+    _fill(store, 2, start=3)
+    journal.append('cand-1', store)
+
+    journal.remove('cand-1')
+    journal.flush()
+    assert 'cand-1' not in journal
+    assert not os.path.exists(os.path.join(journal_dir, 'cand-1'.encode('utf-8').hex()))
+
+
+def test_recover_only_owned_sessions(journal_dir):
+    journal = SessionJournal(journal_dir)
+    store = ActivityStore(capacity=10)
+    _fill(store, 2)
+    for session_id in ('cand-1', 'cand-2', 'cand-3'):
+        _persist(journal, session_id, store)
+
+    recovered = SessionJournal(journal_dir)
+    assert recovered.recover(owns=lambda session_id: session_id != 'cand-2') == 2
+    assert 'cand-2' not in recovered
+    assert recovered.stats()['persisted_sessions'] == 2
+
+
+def test_expire_drops_idle_sessions_not_in_use(journal_dir):
+    journal = SessionJournal(journal_dir)
+    store = ActivityStore(capacity=10)
+    _fill(store, 2)
+    for session_id in ('old', 'loaded', 'recent'):
+        _persist(journal, session_id, store)
+    week_ago = datetime.now().timestamp() - 7 * 24 * 3600
+    for session_id in ('old', 'loaded'):
+        for path in _segment_files(journal_dir, session_id):
+            os.utime(path, (week_ago, week_ago))
+
+    recovered = SessionJournal(journal_dir, retention_seconds=24 * 3600)
+    recovered.in_use = lambda session_id: session_id == 'loaded'
+    recovered.recover()
+    assert 'old' not in recovered
+    assert not os.path.exists(os.path.join(journal_dir, 'old'.encode('utf-8').hex()))
+    assert 'loaded' in recovered
+    assert 'recent' in recovered
+    assert recovered.stats()['expired_sessions'] == 1
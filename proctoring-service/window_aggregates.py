@@ -0,0 +1,143 @@
+# window_aggregates.py - Rolling fixed-time-window aggregates of a session's activity
+from collections import deque
+from datetime import datetime
+import numpy as np
+from activity_store import GAZE_DIRECTIONS, SUMMARY_COUNTERS, counters_of
+from config import Config
+
+
+class WindowAggregator:
+    """
+    Per-session aggregates over fixed, epoch-aligned time windows (one
+    series per size in AGGREGATE_WINDOWS, e.g. 10 s and 1 min).
+
+    Nothing is accumulated per frame: observe() only notices when a
+    frame falls into a later window than the open one, and the finished
+    window is then computed in one vectorized pass over the rows the
+    ActivityStore still holds for it. Windows without frames are not
+    emitted.
+
+    Closed windows are kept (AGGREGATE_HISTORY per size) for queries,
+    and also collected until take_new(), so each one can be handed to
+    the frame submitter exactly once. When the session ends, close_all()
+    emits the windows still in progress (marked complete: False).
+    """
+    def __init__(self, store, windows=None, history=None):
+        self.store = store
+        self.windows = list(windows or Config.AGGREGATE_WINDOWS)
+        self.history_size = history or Config.AGGREGATE_HISTORY
+        self.reset()
+
+    def reset(self):
+        self.open = {}              # seconds -> (window start epoch, first seq)
+        self.history = {seconds: deque(maxlen=self.history_size) for seconds in self.windows}
+        # Bounded too, for callers that never take_new() (e.g. batch runs)
+        self.new = deque(maxlen=self.history_size * len(self.windows))
+
+    @property
+    def nbytes(self):
+        # Rough: a closed window is a small dict of scalars (~1 KB)
+        return 1024 * sum(len(history) for history in self.history.values())
+
+    def observe(self):
+        """Account for the entry just appended to the store"""
+        seq = self.store.next_seq - 1
+        timestamp = float(self.store.columns['timestamp'][seq % self.store.capacity])
+        for seconds in self.windows:
+            start = timestamp - timestamp % seconds
+            current = self.open.get(seconds)
+            if current is not None and current[0] == start:
+                continue
+            if current is not None:
+                self._close(seconds, current, seq)
+            self.open[seconds] = (start, seq)
+
+    def flush(self, now):
+        """Close open windows that ended before `now` (epoch seconds)"""
+        for seconds, current in list(self.open.items()):
+            if current[0] + seconds <= now:
+                self._close(seconds, current, self.store.next_seq)
+                del self.open[seconds]
+
+    def close_all(self):
+        """Close every open window now (the session ended); returns all new windows"""
+        for seconds, current in list(self.open.items()):
+            self._close(seconds, current, self.store.next_seq, complete=False)
+        self.open = {}
+        return self.take_new()
+
+    def _close(self, seconds, current, end_seq, complete=True):
+        window = self._aggregate(seconds, current[0], current[1], end_seq, complete)
+        if window is not None:
+            self.history[seconds].append(window)
+            self.new.append(window)
+
+    def _aggregate(self, seconds, start, first_seq, end_seq, complete):
+        store = self.store
+        # One row before the window, if still retained, for the blink baseline
+        records = store.records(first_seq - 1, end_seq)
+        if len(records) and first_seq - 1 >= store.first_seq:
+            baseline, records = int(records['blink_count'][0]), records[1:]
+        else:
+            baseline = 0
+        if not len(records):
+            return None
+
+        frames = len(records)
+        counters = counters_of(records)
+        blinks = max(int(records['blink_count'].max()) - baseline, 0)
+        objects = records['detected_objects']
+
+        return {
+            'window_seconds': seconds,
+            'start': datetime.fromtimestamp(start).isoformat(),
+            'end': datetime.fromtimestamp(start + seconds).isoformat(),
+            'complete': complete,
+            'frames': frames,
+            'violations': {
+                **{name: counters[name] for name in SUMMARY_COUNTERS.values()},
+                'total': counters['total_violations']
+            },
+            'face_present_ratio': round(float(np.count_nonzero(records['faces_count'])) / frames, 3),
+            'gaze_away_ratio': round(float(np.count_nonzero(
+                records['gaze_direction'] == GAZE_DIRECTIONS.index('looking_away'))) / frames, 3),
+            'blinks': blinks,
+            'blink_rate_per_minute': round(blinks * 60.0 / seconds, 1),
+            # Frames each suspicious object was seen in
+            'object_sightings': {
+                name: int(np.count_nonzero(objects & (1 << i)))
+                for i, name in enumerate(Config.SUSPICIOUS_OBJECTS)
+                if np.any(objects & (1 << i))
+            }
+        }
+
+    def take_new(self):
+        """Windows closed since the last call, oldest first"""
+        new = list(self.new)
+        self.new.clear()
+        return new
+
+    def query(self, seconds, after=None, limit=None, now=None):
+        """
+        Closed windows of one size that start after `after` (epoch
+        seconds), oldest first, plus the window still in progress.
+        The returned cursor is the start of the last window returned.
+        """
+        if seconds not in self.history:
+            raise ValueError(f"No {seconds}s aggregate window is configured")
+        if now is not None:
+            self.flush(now)
+
+        windows = [
+            w for w in self.history[seconds]
+            if after is None or datetime.fromisoformat(w['start']).timestamp() > after
+        ]
+        if limit is not None:
+            windows = windows[:limit]
+
+        current = self.open.get(seconds)
+        if current is not None:
+            current = self._aggregate(seconds, current[0], current[1], self.store.next_seq, complete=False)
+
+        cursor = datetime.fromisoformat(windows[-1]['start']).timestamp() if windows else after
+        return {'windows': windows, 'current': current, 'cursor': cursor}
@@ -0,0 +1,195 @@
+# worker_pool.py - Multi-process serving with session-affinity sharding
+import itertools
+import logging
+import multiprocessing
+import queue
+import signal
+import threading
+import zlib
+import cv2
+from metrics import metrics
+from model_registry import get_model_registry
+from profiles import load_shedder
+from sessions import create_session_registry, run_session_op
+
+logger = logging.getLogger(__name__)
+
+
+def worker_index(session_id, num_workers):
+    """Worker that owns a session: stable across restarts for the same num_workers"""
+    return zlib.crc32(session_id.encode('utf-8')) % num_workers
+
+
+def _exit_worker(signum, frame):
+    raise SystemExit(0)
+
+
+def _worker_main(index, num_workers, requests, responses):
+    """Worker process: owns the engines of every session routed to it"""
+    # One worker per core - keep OpenCV from spawning its own thread pool
+    cv2.setNumThreads(1)
+    # Ctrl-C reaches the whole process group; the parent shuts workers
+    # down in order instead. SIGTERM exits through the finally below.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _exit_worker)
+    # Each persisted session is recovered (and expired) by its own worker only
+    session_registry = create_session_registry(
+        owns=lambda session_id: worker_index(session_id, num_workers) == index
+    )
+    try:
+        _serve(requests, responses, session_registry)
+    finally:
+        # atexit handlers don't run in forked workers: flush the journal here
+        session_registry.close()
+
+
+def _serve(requests, responses, session_registry):
+    while True:
+        item = requests.get()
+        if item is None:
+            return
+        
+        request_id, session_id, op, args = item
+        try:
+            # Requests waiting behind this one count towards overload
+            load_shedder.set_queue_depth(requests.qsize())
+        except NotImplementedError:
+            pass
+        try:
+            result = (True, run_session_op(session_registry, session_id, op, *args))
+        except Exception as e:
+            result = (False, e)
+        responses.put((request_id, result))
+
+
+class WorkerDied(RuntimeError):
+    """Raised for requests that were in flight on a worker process that died"""
+    pass
+
+
+class WorkerPool:
+    """
+    Runs N worker processes and routes every session_id to the same one
+    (crc32 of the id, so routing is stable across restarts), keeping
+    blink counters and activity logs local to that worker.
+
+    Models are loaded before the workers are forked, so their weights
+    are shared copy-on-write rather than loaded N times.
+
+    Each worker has its own request and response queues and a dispatcher
+    thread that also watches the process. If a worker dies (e.g. a crash
+    inside OpenCV), its in-flight requests fail with WorkerDied within
+    about a second, and a fresh worker is forked in its place. The
+    sessions it held start over, or are reloaded from the session
+    journal if one is configured.
+    """
+    # How often an idle dispatcher checks that its worker is still alive
+    LIVENESS_INTERVAL = 1.0
+
+    def __init__(self, num_workers, timeout=30):
+        self.num_workers = max(1, num_workers)
+        self.timeout = timeout
+        
+        # Load shared models in the parent so children inherit them
+        get_model_registry().warm_up()
+        
+        self._mp = multiprocessing.get_context('fork')
+        self._requests = [None] * self.num_workers
+        self._processes = [None] * self.num_workers
+        self._closing = False
+        
+        self._pending = {}                  # request_id -> [Event, result, worker index]
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count()
+        
+        for index in range(self.num_workers):
+            self._start_worker(index)
+        logger.info("Started %d proctoring worker processes", self.num_workers)
+    
+    def _start_worker(self, index):
+        requests = self._mp.Queue()
+        responses = self._mp.Queue()
+        process = self._mp.Process(
+            target=_worker_main,
+            args=(index, self.num_workers, requests, responses),
+            name=f'proctoring-worker-{index}',
+            daemon=True
+        )
+        process.start()
+        with self._pending_lock:
+            self._requests[index] = requests
+            self._processes[index] = process
+        threading.Thread(
+            target=self._dispatch, args=(index, process, responses),
+            name=f'worker-pool-dispatch-{index}', daemon=True
+        ).start()
+    
+    def worker_for(self, session_id):
+        return worker_index(session_id, self.num_workers)
+    
+    def _dispatch(self, index, process, responses):
+        """Deliver one worker's responses; replaces the worker once it has died"""
+        while True:
+            try:
+                request_id, result = responses.get(timeout=self.LIVENESS_INTERVAL)
+            except queue.Empty:
+                # Only checked once everything it sent has been delivered
+                if process.is_alive():
+                    continue
+                if not self._closing:
+                    self._replace(index, process)
+                return
+            with self._pending_lock:
+                slot = self._pending.pop(request_id, None)
+            if slot is not None:
+                slot[1] = result
+                slot[0].set()
+    
+    def _replace(self, index, process):
+        """Fail the dead worker's outstanding requests and fork a new one"""
+        with self._pending_lock:
+            lost = [rid for rid, slot in self._pending.items() if slot[2] == index]
+            slots = [self._pending.pop(rid) for rid in lost]
+        
+        logger.error("Worker %d died (exit code %s), %d request(s) lost; restarting it",
+                     index, process.exitcode, len(slots))
+        metrics.inc('proctoring_worker_restarts_total')
+        error = WorkerDied(f"Worker {index} exited with code {process.exitcode}")
+        for slot in slots:
+            slot[1] = (False, error)
+            slot[0].set()
+        self._start_worker(index)
+    
+    def _submit(self, index, session_id, op, args):
+        request_id = next(self._ids)
+        slot = [threading.Event(), None, index]
+        with self._pending_lock:
+            # Registered and queued together, so a request either reaches
+            # the current worker or is failed by _replace
+            self._pending[request_id] = slot
+            self._requests[index].put((request_id, session_id, op, args))
+        
+        if not slot[0].wait(self.timeout):
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            raise TimeoutError(f"Worker {index} did not answer '{op}' within {self.timeout}s")
+        
+        ok, value = slot[1]
+        if ok:
+            return value
+        raise value
+    
+    def call(self, session_id, op, *args):
+        """Run a session operation on the worker that owns session_id"""
+        return self._submit(self.worker_for(session_id), session_id, op, args)
+    
+    def broadcast(self, op, *args):
+        """Run an operation on every worker; returns one result per worker"""
+        return [self._submit(index, None, op, args) for index in range(self.num_workers)]
+    
+    def shutdown(self):
+        self._closing = True
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
@@ -0,0 +1,117 @@
+# yolo_batcher.py - Cross-session batched YOLO inference
+import os
+import threading
+import time
+import cv2
+
+
+class _Request:
+    __slots__ = ('image', 'event', 'outputs', 'error')
+
+    def __init__(self, image):
+        self.image = image
+        self.event = threading.Event()
+        self.outputs = None
+        self.error = None
+
+
+class YoloBatcher:
+    """
+    Collects YOLO requests from concurrent sessions and runs them as one
+    N-image forward pass.
+
+    The first request in a batch waits at most `max_wait_ms` for others
+    to join; a batch is dispatched early once it reaches `max_batch_size`.
+    Each caller blocks in infer() and gets back only its own slice of
+    the output tensors, in the same per-image layout that a single
+    blobFromImage + forward would produce.
+    """
+    def __init__(self, net, output_layers, net_lock, input_size=(416, 416),
+                 max_batch_size=8, max_wait_ms=5):
+        self.net = net
+        self.output_layers = output_layers
+        self.net_lock = net_lock
+        self.input_size = input_size
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._cond = threading.Condition()
+        self._queue = []
+
+        self.stats = {'batches': 0, 'images': 0, 'max_batch': 0}
+
+        # The worker thread is started lazily, and again after a fork
+        # (threads don't survive into worker processes)
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._worker_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._worker_pid != os.getpid():
+                self._cond = threading.Condition()
+                self._queue = []
+                threading.Thread(target=self._run, name='yolo-batcher', daemon=True).start()
+                self._worker_pid = os.getpid()
+
+    def infer(self, image):
+        """Run YOLO on one BGR image; returns the list of output arrays"""
+        self._ensure_worker()
+        request = _Request(image)
+        with self._cond:
+            self._queue.append(request)
+            self._cond.notify()
+        request.event.wait()
+        if request.error is not None:
+            raise request.error
+        return request.outputs
+
+    def get_stats(self):
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'avg_batch': round(self.stats['images'] / batches, 2) if batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000
+        }
+
+    def _collect(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            # First request opens the window; wait for more to join
+            deadline = time.monotonic() + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[:self.max_batch_size]
+            del self._queue[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                blob = cv2.dnn.blobFromImages(
+                    [r.image for r in batch], 0.00392, self.input_size, (0, 0, 0), True, crop=False
+                )
+                with self.net_lock:
+                    self.net.setInput(blob)
+                    outs = self.net.forward(self.output_layers)
+
+                # Batched outputs are (N, rows, 85); hand each caller its slice
+                for i, request in enumerate(batch):
+                    request.outputs = [out[i] if out.ndim == 3 else out for out in outs]
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+
+            self.stats['batches'] += 1
+            self.stats['images'] += len(batch)
+            self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+
+            for request in batch:
+                request.event.set()